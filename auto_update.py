@@ -3,24 +3,56 @@ Automated Data Update Script for ENT Agency Vector Database
 Run this script periodically to keep your vector database up-to-date
 """
 
+import io
 import os
+import copy
 import json
 import sys
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from data_ingestion import ingest_from_google_sheets
+
+# orjson parses noticeably faster; fall back to the stdlib parser without it
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# Missing Google/Pinecone packages are reported by main() instead of failing on import
+try:
+    from data_ingestion import ingest_from_google_sheets, get_extractor, get_vector_db, close_vector_dbs
+    from pinecone_setup import configure_logging
+except ImportError as e:
+    _import_error = e
+else:
+    _import_error = None
+
+LOG_FILE = Path("update_log.txt")
+
+# Serializes writes to a log file shared by concurrent updates
+_log_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def _read_config(path, mtime):
+    """Parse a config file; mtime is part of the cache key so edits are picked up"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
 
 
 def load_config():
-    """Load configuration from config.json"""
+    """Load configuration from config.json (a fresh copy each call, so callers may modify it)"""
     config_file = Path("config.json")
     
-    if not config_file.exists():
+    try:
+        mtime = config_file.stat().st_mtime_ns
+    except FileNotFoundError:
         print("❌ config.json not found. Run quick_start.py first.")
         return None
     
-    with open(config_file, 'r') as f:
-        return json.load(f)
+    return copy.deepcopy(_read_config(str(config_file), mtime))
 
 
 def get_current_quarter():
@@ -30,85 +62,178 @@ def get_current_quarter():
     return f"{now.year} Q{quarter}"
 
 
-def update_database(spreadsheet_id, sheet_name=None, quarter=None, creator=None):
-    """Update the vector database with latest data"""
+def update_database(spreadsheet_id, sheet_name=None, quarter=None, creator=None, rows=None, logf=None,
+                    incremental=True, out=None):
+    """
+    Update the vector database with latest data
     
-    print("\n" + "="*70)
-    print("  ENT Agency Vector Database - Automated Update")
-    print("="*70)
-    print(f"\nTimestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Spreadsheet: {spreadsheet_id}")
+    Args:
+        incremental: False re-ingests rows that are already stored unchanged
+        out: Stream the update report is printed to (sys.stdout if not given)
+    """
+    emit = functools.partial(print, file=out)
+    
+    emit("\n" + "="*70)
+    emit("  ENT Agency Vector Database - Automated Update")
+    emit("="*70)
+    emit(f"\nTimestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    emit(f"Spreadsheet: {spreadsheet_id}")
     if sheet_name:
-        print(f"Sheet: {sheet_name}")
+        emit(f"Sheet: {sheet_name}")
     if quarter:
-        print(f"Quarter: {quarter}")
+        emit(f"Quarter: {quarter}")
     if creator:
-        print(f"Creator: {creator}")
+        emit(f"Creator: {creator}")
     
     # Get API keys
     PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     
     if not PINECONE_API_KEY or not OPENAI_API_KEY:
-        print("\n❌ API keys not found in environment")
-        print("Set PINECONE_API_KEY and OPENAI_API_KEY")
+        emit("\n❌ API keys not found in environment")
+        emit("Set PINECONE_API_KEY and OPENAI_API_KEY")
         return False
     
     try:
         # Run ingestion
-        ingest_from_google_sheets(
+        summary = ingest_from_google_sheets(
             spreadsheet_id=spreadsheet_id,
             pinecone_api_key=PINECONE_API_KEY,
             openai_api_key=OPENAI_API_KEY,
             credentials_file='credentials.json',
             sheet_name=sheet_name,
             quarter=quarter,
-            creator=creator
+            creator=creator,
+            rows=rows,
+            incremental=incremental,
+            out=out
         )
         
-        print("\n✅ Database update completed successfully!")
+        emit("\n✅ Database update completed successfully!")
         
         # Log the update
-        log_update(spreadsheet_id, sheet_name, quarter)
+        log_update(spreadsheet_id, sheet_name, quarter,
+                   skipped_unchanged=summary.get('skipped_unchanged') if summary else None,
+                   logf=logf)
         
         return True
         
     except Exception as e:
-        print(f"\n❌ Update failed: {e}")
+        emit(f"\n❌ Update failed: {e}")
         return False
 
 
-def log_update(spreadsheet_id, sheet_name, quarter):
-    """Log update to file"""
-    log_file = Path("update_log.txt")
+def log_update(spreadsheet_id, sheet_name, quarter, skipped_unchanged=None, logf=None):
+    """
+    Log update to file
     
+    Args:
+        logf: Open log file shared by a multi-sheet run; update_log.txt is opened per call if not given
+    """
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    log_entry = f"{timestamp} | {spreadsheet_id} | {sheet_name or 'default'} | {quarter or 'auto'}\n"
+    log_entry = f"{timestamp} | {spreadsheet_id} | {sheet_name or 'default'} | {quarter or 'auto'}"
+    if skipped_unchanged is not None:
+        log_entry += f" | skipped_unchanged={skipped_unchanged}"
+    log_entry += "\n"
+    
+    if logf is not None:
+        with _log_lock:
+            logf.write(log_entry)
+        return
     
-    with open(log_file, 'a') as f:
+    with open(LOG_FILE, 'a') as f:
         f.write(log_entry)
 
 
-def update_multiple_sheets(sheet_configs):
+def prefetch_sheets(sheet_configs):
+    """
+    Read every tab that shares a spreadsheet with one values.batchGet call
+    
+    Args:
+        sheet_configs: List of dicts with 'spreadsheet_id' and 'sheet_name'
+    
+    Returns:
+        Dict mapping (spreadsheet_id, sheet_name) to row iterators; tabs that could not be
+        prefetched are left out and read individually by update_database
+    """
+    tabs_by_spreadsheet = {}
+    for config in sheet_configs:
+        tabs = tabs_by_spreadsheet.setdefault(config['spreadsheet_id'], [])
+        if config.get('sheet_name') not in tabs:
+            tabs.append(config.get('sheet_name'))
+    
+    # Only spreadsheets with several tabs save round-trips
+    tabs_by_spreadsheet = {k: v for k, v in tabs_by_spreadsheet.items() if len(v) > 1}
+    if not tabs_by_spreadsheet:
+        return {}
+    
+    prefetched = {}
+    try:
+        extractor = get_extractor('credentials.json')
+        for spreadsheet_id, sheet_names in tabs_by_spreadsheet.items():
+            for sheet_name, rows in extractor.extract_from_sheets(spreadsheet_id, sheet_names).items():
+                prefetched[(spreadsheet_id, sheet_name)] = rows
+    except Exception as e:
+        print(f"\n⚠️  Could not prefetch sheets ({e}), reading them one at a time")
+    
+    return prefetched
+
+
+def update_multiple_sheets(sheet_configs, incremental=True):
     """
     Update from multiple sheets/quarters
     
     Args:
         sheet_configs: List of dicts with 'spreadsheet_id', 'sheet_name', 'quarter', 'creator'
+        incremental: False re-ingests rows that are already stored unchanged
     """
     print(f"\n📊 Updating {len(sheet_configs)} data sources...")
     
+    # Connect once here, before any worker starts, so a missing index is reported (and
+    # create_index's prompt answered) on the console; workers then reuse the cached connection
+    pinecone_api_key = os.getenv('PINECONE_API_KEY')
+    openai_api_key = os.getenv('OPENAI_API_KEY')
+    if pinecone_api_key and openai_api_key:
+        try:
+            get_vector_db(pinecone_api_key, openai_api_key)
+        except Exception as e:
+            print(f"\n❌ Could not connect to Pinecone: {e}")
+            return
+    
+    prefetched = prefetch_sheets(sheet_configs)
+    
+    # Each update is mostly waiting on Sheets/OpenAI/Pinecone, so run several at once
+    max_workers = int(os.environ.get('UPDATE_N_THREADS', 4))
+    print_lock = threading.Lock()
+    total = len(sheet_configs)
+    
+    def run(i, config):
+        # Each source's report is collected and printed in one piece, so concurrent
+        # updates don't interleave their output
+        buffer = io.StringIO()
+        try:
+            print(f"\n[{i}/{total}] Processing: {config.get('sheet_name', 'default')}", file=buffer)
+            
+            return update_database(
+                spreadsheet_id=config['spreadsheet_id'],
+                sheet_name=config.get('sheet_name'),
+                quarter=config.get('quarter'),
+                creator=config.get('creator'),
+                # Prefetched rows are a one-shot iterator; a repeated tab re-reads the sheet
+                rows=prefetched.pop((config['spreadsheet_id'], config.get('sheet_name')), None),
+                logf=logf,
+                incremental=incremental,
+                out=buffer
+            )
+        finally:
+            with print_lock:
+                print(buffer.getvalue(), end='', flush=True)
+    
     success_count = 0
-    for i, config in enumerate(sheet_configs, 1):
-        print(f"\n[{i}/{len(sheet_configs)}] Processing: {config.get('sheet_name', 'default')}")
-        
-        if update_database(
-            spreadsheet_id=config['spreadsheet_id'],
-            sheet_name=config.get('sheet_name'),
-            quarter=config.get('quarter'),
-            creator=config.get('creator')
-        ):
-            success_count += 1
+    with open(LOG_FILE, 'a', buffering=8192) as logf, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run, i, config) for i, config in enumerate(sheet_configs, 1)]
+        for future in as_completed(futures):
+            success_count += bool(future.result())
     
     print(f"\n{'='*70}")
     print(f"✅ Successfully updated {success_count}/{len(sheet_configs)} data sources")
@@ -118,56 +243,75 @@ def update_multiple_sheets(sheet_configs):
 def main():
     """Main function"""
     
-    # Check for command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '--help' or sys.argv[1] == '-h':
-            print("Usage:")
-            print("  python auto_update.py              # Use config.json")
-            print("  python auto_update.py <sheet_id>   # Update specific sheet")
-            print("  python auto_update.py --current    # Update current quarter")
-            return
-        
-        elif sys.argv[1] == '--current':
-            # Update current quarter only
-            config = load_config()
-            if not config:
+    if _import_error:
+        print(f"❌ Missing dependency: {_import_error}")
+        print("Install the required packages with:")
+        print("  pip install -r requirements.txt")
+        sys.exit(1)
+    
+    configure_logging()
+    
+    # --full can be combined with any mode to re-ingest rows that are stored unchanged
+    args = [arg for arg in sys.argv[1:] if arg != '--full']
+    incremental = len(args) == len(sys.argv) - 1
+    
+    try:
+        # Check for command line arguments
+        if args:
+            if args[0] == '--help' or args[0] == '-h':
+                print("Usage:")
+                print("  python auto_update.py              # Use config.json")
+                print("  python auto_update.py <sheet_id>   # Update specific sheet")
+                print("  python auto_update.py --current    # Update current quarter")
+                print("  python auto_update.py --full ...   # Re-ingest every row, even unchanged ones")
                 return
             
-            current_q = get_current_quarter()
-            print(f"Updating current quarter: {current_q}")
+            elif args[0] == '--current':
+                # Update current quarter only
+                config = load_config()
+                if not config:
+                    return
+                
+                current_q = get_current_quarter()
+                print(f"Updating current quarter: {current_q}")
+                
+                update_database(
+                    spreadsheet_id=config['spreadsheet_id'],
+                    sheet_name=config.get('sheet_name'),
+                    quarter=current_q,
+                    creator=config.get('creator'),
+                    incremental=incremental
+                )
+                return
             
+            else:
+                # Use provided spreadsheet ID
+                spreadsheet_id = args[0]
+                sheet_name = args[1] if len(args) > 1 else None
+                quarter = args[2] if len(args) > 2 else None
+                
+                update_database(spreadsheet_id, sheet_name, quarter, incremental=incremental)
+                return
+        
+        # Use config.json
+        config = load_config()
+        if not config:
+            return
+        
+        # Check if it's a multi-sheet config
+        if isinstance(config, list):
+            update_multiple_sheets(config, incremental=incremental)
+        else:
             update_database(
                 spreadsheet_id=config['spreadsheet_id'],
                 sheet_name=config.get('sheet_name'),
-                quarter=current_q,
-                creator=config.get('creator')
+                quarter=config.get('quarter'),
+                creator=config.get('creator'),
+                incremental=incremental
             )
-            return
-        
-        else:
-            # Use provided spreadsheet ID
-            spreadsheet_id = sys.argv[1]
-            sheet_name = sys.argv[2] if len(sys.argv) > 2 else None
-            quarter = sys.argv[3] if len(sys.argv) > 3 else None
-            
-            update_database(spreadsheet_id, sheet_name, quarter)
-            return
-    
-    # Use config.json
-    config = load_config()
-    if not config:
-        return
-    
-    # Check if it's a multi-sheet config
-    if isinstance(config, list):
-        update_multiple_sheets(config)
-    else:
-        update_database(
-            spreadsheet_id=config['spreadsheet_id'],
-            sheet_name=config.get('sheet_name'),
-            quarter=config.get('quarter'),
-            creator=config.get('creator')
-        )
+    finally:
+        # Release the pooled Pinecone connections and the embedding cache
+        close_vector_dbs()
 
 
 if __name__ == "__main__":
@@ -2,11 +2,13 @@
 """Check if required packages are installed"""
 
 import sys
+from importlib.metadata import distribution, PackageNotFoundError
 
+# Keyed by distribution name, so presence is checked without importing the package
 packages = {
     'pinecone': 'Pinecone SDK',
     'openai': 'OpenAI SDK',
-    'dotenv': 'python-dotenv'
+    'python-dotenv': 'python-dotenv'
 }
 
 print("Checking installed packages...")
@@ -15,9 +17,9 @@ print("=" * 50)
 all_installed = True
 for package, name in packages.items():
     try:
-        __import__(package)
+        distribution(package)
         print(f"OK {name} is installed")
-    except ImportError:
+    except PackageNotFoundError:
         print(f"FAIL {name} is NOT installed")
         all_installed = False
 
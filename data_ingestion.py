@@ -4,8 +4,13 @@ This script extracts data from Google Sheets and loads it into Pinecone
 """
 
 import os
+import re
 import json
-from typing import List, Dict, Any
+import functools
+import threading
+import hashlib
+from itertools import chain, count, islice
+from typing import List, Dict, Any, Optional, Iterable, Iterator, TextIO
 from datetime import datetime
 
 # Load environment variables from .env file if it exists
@@ -15,30 +20,190 @@ try:
 except ImportError:
     pass  # dotenv is optional
 
-try:
-    from google.oauth2.credentials import Credentials
-    from google.auth.transport.requests import Request
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
-except ImportError:
-    print("Installing required packages...")
-    import subprocess
-    subprocess.check_call([
-        "pip", "install", 
-        "gspread", "oauth2client", "google-auth", "google-auth-oauthlib", 
-        "google-auth-httplib2", "google-api-python-client",
-        "--break-system-packages"
-    ])
-    from google.oauth2.credentials import Credentials
-    from google.auth.transport.requests import Request
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
-
-from pinecone_setup import ENTAgencyVectorDB
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+from pinecone_setup import ENTAgencyVectorDB, configure_logging, _id_part
+
+# Column span read from the first sheet when no tab is named (a range needs one there);
+# named tabs are read whole. Columns past ZZ (the 702nd) are not read from the first sheet
+SHEET_COLUMNS = "A:ZZ"
+
+# Metric columns, matched against normalized header names
+METRIC_FIELDS = (
+    'impressions', 'reach', 'engagement', 'likes', 'comments',
+    'shares', 'saves', 'clicks', 'views', 'engagement_rate'
+)
+
+# Campaign text fields and the sheet headers they may appear under, in order of preference
+TEXT_COLUMNS = (
+    ('quarter', ('Quarter',)),
+    ('creator', ('Creator', 'Influencer')),
+    ('brand', ('Brand', 'Client')),
+    ('campaign_type', ('Campaign Type', 'Type')),
+    ('platform', ('Platform',)),
+    ('date', ('Date', 'Post Date')),
+    ('content_description', ('Description', 'Content')),
+    ('notes', ('Notes',)),
+)
+
+# Columns holding a stable per-row identifier, in order of preference; rows with one keep their
+# campaign ID when rows above them are inserted or deleted (others are keyed on their row number)
+ROW_KEY_COLUMNS = ('Campaign ID', 'Post ID', 'ID')
+
+# Revenue columns in order of preference, matched against normalized header names
+REVENUE_KEYS = ('revenue', 'earnings', 'payment')
+
+# Thousands separators, percent and currency signs and stray whitespace stripped before float()
+_NUM_JUNK = re.compile(r'[,$%\s]')
+
+# Campaigns pulled through the pipeline per ingest call
+INGEST_CHUNK_SIZE = 256
+
+# Guards the shared Sheets client and vector DB so concurrent updates build them once
+_connect_lock = threading.Lock()
+
+# (pinecone_api_key, openai_api_key) -> connected ENTAgencyVectorDB handed out by get_vector_db
+_vector_dbs = {}
+
+
+def _sheet_range(sheet_name: Optional[str]) -> str:
+    """A1 range for a tab; a range without a tab name refers to the first visible sheet"""
+    if not sheet_name:
+        return SHEET_COLUMNS
+    # A bare tab name is the whole tab, however many columns it has
+    escaped = sheet_name.replace("'", "''")
+    return f"'{escaped}'"
+
+
+def _iter_records(values: List[List[Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Turn a header row plus data rows into dicts, like gspread's get_all_records()
+    
+    The header row is checked right away; the row dicts are built lazily as they are consumed.
+    Columns with a blank header are left out.
+    
+    Raises:
+        gspread.exceptions.GSpreadException: If two columns share a header
+    """
+    if not values:
+        return iter(())
+    
+    headers = [str(header).strip() for header in values[0]]
+    named = [header for header in headers if header]
+    if len(set(named)) != len(named):
+        duplicates = sorted({header for header in named if named.count(header) > 1})
+        raise gspread.exceptions.GSpreadException(
+            f"the header row in the worksheet is not unique: {', '.join(duplicates)}"
+        )
+    
+    return _iter_rows(headers, values[1:])
+
+
+def _iter_rows(headers: List[str], rows: List[List[Any]]) -> Iterator[Dict[str, Any]]:
+    """Row dicts for _iter_records, skipping blank-header columns"""
+    width = len(headers)
+    has_blank = not all(headers)
+    for row in rows:
+        # The API trims trailing empty cells, so pad short rows back out to the header width
+        row = row + [''] * (width - len(row))
+        if has_blank:
+            yield {header: value for header, value in zip(headers, row) if header}
+        else:
+            yield dict(zip(headers, row))
+
+
+def _row_id_prefix(spreadsheet_id: str, sheet_name: Optional[str]) -> str:
+    """Campaign ID prefix for one tab; rows are stored as <prefix>_key_<ID> or <prefix>_row<N>"""
+    return f"{spreadsheet_id}_{_id_part(sheet_name or 'first_sheet')}"
+
+
+def _row_hash(campaign: Dict[str, Any]) -> str:
+    """Fingerprint of a transformed row, used to skip unchanged rows on re-ingest"""
+    payload = json.dumps(campaign, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def transform_to_campaign_format(raw_data: Iterable[Dict], quarter: str = None,
+                                 creator: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Transform raw spreadsheet data into campaign format
+    
+    This function should be customized based on your actual spreadsheet structure
+    
+    Args:
+        raw_data: Raw data from Google Sheets
+        quarter: Quarter to assign (if not in data)
+        creator: Creator name to assign (if not in data)
+    
+    Returns:
+        Iterator of formatted campaign dictionaries
+    """
+    rows = iter(raw_data)
+    first = next(rows, None)
+    if first is None:
+        return
+    
+    # Every row shares the sheet's header row, so resolve text, metric and revenue
+    # columns once per sheet ("Engagement Rate" -> "engagement_rate")
+    normalized = {}
+    for header in first.keys():
+        normalized.setdefault(str(header).strip().lower().replace(' ', '_'), header)
+    text_columns = [
+        (field, next((alias for alias in aliases if alias in first), None))
+        for field, aliases in TEXT_COLUMNS
+    ]
+    metric_columns = [(field, normalized[field]) for field in METRIC_FIELDS if field in normalized]
+    revenue_columns = [normalized[key] for key in REVENUE_KEYS if key in normalized]
+    key_column = next((column for column in ROW_KEY_COLUMNS if column in first), None)
+    defaults = {'quarter': quarter, 'creator': creator}
+    
+    for row in chain([first], rows):
+        campaign = {}
+        
+        # Map your actual column names to the expected format
+        # Customize TEXT_COLUMNS based on your spreadsheet structure
+        for field, column in text_columns:
+            default = defaults.get(field, '')
+            campaign[field] = row.get(column, default) if column else default
+        
+        # Extract metrics
+        metrics = {}
+        for field, column in metric_columns:
+            value = row.get(column)
+            if value in (None, ''):
+                continue
+            # Clean and convert to number
+            if isinstance(value, str):
+                value = _NUM_JUNK.sub('', value)
+            try:
+                metrics[field] = float(value)
+            except ValueError:
+                pass
+        
+        if metrics:
+            campaign['metrics'] = metrics
+        
+        # Extract revenue
+        for revenue_column in revenue_columns:
+            revenue_value = row.get(revenue_column)
+            if revenue_value:
+                if isinstance(revenue_value, str):
+                    revenue_value = _NUM_JUNK.sub('', revenue_value)
+                try:
+                    campaign['revenue'] = float(revenue_value)
+                    break
+                except ValueError:
+                    pass
+        
+        campaign['_row_hash'] = _row_hash(campaign)
+        if key_column:
+            campaign['_row_key'] = str(row.get(key_column, '')).strip()
+        yield campaign
 
 
 class GoogleSheetsExtractor:
@@ -53,6 +218,8 @@ class GoogleSheetsExtractor:
         """
         self.credentials_file = credentials_file
         self.client = None
+        # The gspread client (and its HTTP session) isn't thread-safe; one Sheets call at a time
+        self._lock = threading.Lock()
         
     def authenticate_service_account(self):
         """Authenticate using service account"""
@@ -93,7 +260,7 @@ class GoogleSheetsExtractor:
         self.client = gspread.authorize(creds)
         print("✓ Authenticated with OAuth")
     
-    def extract_from_sheet(self, spreadsheet_id: str, sheet_name: str = None) -> List[Dict[str, Any]]:
+    def extract_from_sheet(self, spreadsheet_id: str, sheet_name: str = None) -> Iterator[Dict[str, Any]]:
         """
         Extract data from a Google Sheet
         
@@ -102,98 +269,111 @@ class GoogleSheetsExtractor:
             sheet_name: Specific sheet/tab name (uses first sheet if not provided)
         
         Returns:
-            List of campaign dictionaries
+            Iterator of row dictionaries, built lazily as they are consumed
         """
-        if not self.client:
-            raise Exception("Not authenticated. Call authenticate_service_account() or authenticate_oauth() first")
-        
-        print(f"Opening spreadsheet: {spreadsheet_id}")
-        spreadsheet = self.client.open_by_key(spreadsheet_id)
-        
-        if sheet_name:
-            worksheet = spreadsheet.worksheet(sheet_name)
-        else:
-            worksheet = spreadsheet.get_worksheet(0)
-        
-        print(f"Reading data from sheet: {worksheet.title}")
-        
-        # Get all values
-        data = worksheet.get_all_records()
-        
-        print(f"✓ Extracted {len(data)} rows")
-        return data
+        return self.extract_from_sheets(spreadsheet_id, [sheet_name])[sheet_name]
     
-    def transform_to_campaign_format(self, raw_data: List[Dict], 
-                                     quarter: str = None,
-                                     creator: str = None) -> List[Dict[str, Any]]:
+    def extract_from_sheets(self, spreadsheet_id: str,
+                            sheet_names: List[Optional[str]]) -> Dict[Optional[str], Iterator[Dict[str, Any]]]:
         """
-        Transform raw spreadsheet data into campaign format
-        
-        This function should be customized based on your actual spreadsheet structure
+        Extract several tabs of one spreadsheet with a single values.batchGet call
         
         Args:
-            raw_data: Raw data from Google Sheets
-            quarter: Quarter to assign (if not in data)
-            creator: Creator name to assign (if not in data)
+            spreadsheet_id: The ID from the Google Sheets URL
+            sheet_names: Sheet/tab names to read (None means the first sheet)
         
         Returns:
-            List of formatted campaign dictionaries
+            Dict mapping each requested sheet name to an iterator of row dictionaries
+            (each iterator can be consumed once)
         """
-        campaigns = []
+        if not self.client:
+            raise Exception("Not authenticated. Call authenticate_service_account() or authenticate_oauth() first")
         
-        for row in raw_data:
-            campaign = {}
-            
-            # Map your actual column names to the expected format
-            # Customize these mappings based on your spreadsheet structure
-            
-            campaign['quarter'] = row.get('Quarter', quarter)
-            campaign['creator'] = row.get('Creator', row.get('Influencer', creator))
-            campaign['brand'] = row.get('Brand', row.get('Client', ''))
-            campaign['campaign_type'] = row.get('Campaign Type', row.get('Type', ''))
-            campaign['platform'] = row.get('Platform', '')
-            campaign['date'] = row.get('Date', row.get('Post Date', ''))
-            campaign['content_description'] = row.get('Description', row.get('Content', ''))
-            campaign['notes'] = row.get('Notes', '')
-            
-            # Extract metrics
-            metrics = {}
-            metric_fields = [
-                'impressions', 'reach', 'engagement', 'likes', 'comments', 
-                'shares', 'saves', 'clicks', 'views', 'engagement_rate'
-            ]
-            
-            for field in metric_fields:
-                # Try different capitalizations
-                for key_variant in [field, field.title(), field.upper(), field.replace('_', ' ').title()]:
-                    if key_variant in row:
-                        value = row[key_variant]
-                        if value and value != '':
-                            # Clean and convert to number
-                            if isinstance(value, str):
-                                value = value.replace(',', '').replace('%', '')
-                            try:
-                                metrics[field] = float(value)
-                            except:
-                                pass
-                        break
-            
-            if metrics:
-                campaign['metrics'] = metrics
-            
-            # Extract revenue
-            for revenue_key in ['Revenue', 'revenue', 'Earnings', 'earnings', 'Payment', 'payment']:
-                if revenue_key in row and row[revenue_key]:
-                    try:
-                        revenue_value = str(row[revenue_key]).replace('$', '').replace(',', '')
-                        campaign['revenue'] = float(revenue_value)
-                        break
-                    except:
-                        pass
-            
-            campaigns.append(campaign)
+        print(f"Opening spreadsheet: {spreadsheet_id}")
+        ranges = [_sheet_range(name) for name in sheet_names]
+        with self._lock:
+            spreadsheet = self.client.open_by_key(spreadsheet_id)
+            # Formatted values, as get_all_records() read them: a "5%" cell stays "5%" (not 0.05),
+            # so metrics keep the scale of campaigns already in the index
+            response = spreadsheet.values_batch_get(ranges, params={'valueRenderOption': 'FORMATTED_VALUE'})
         
-        return campaigns
+        data = {}
+        for name, value_range in zip(sheet_names, response.get('valueRanges', [])):
+            title = value_range.get('range', '').rsplit('!', 1)[0].strip("'")
+            print(f"Reading data from sheet: {title}")
+            values = value_range.get('values', [])
+            data[name] = _iter_records(values)
+            print(f"✓ Extracted {max(len(values) - 1, 0)} rows")
+        
+        return data
+    
+    def transform_to_campaign_format(self, raw_data: Iterable[Dict], 
+                                     quarter: str = None,
+                                     creator: str = None) -> Iterator[Dict[str, Any]]:
+        """Transform raw spreadsheet data into campaign format (see the module-level function)"""
+        return transform_to_campaign_format(raw_data, quarter, creator)
+
+
+def connect_extractor(credentials_file: str = None) -> GoogleSheetsExtractor:
+    """
+    Create an authenticated GoogleSheetsExtractor
+    
+    Uses the service account flow for .json key files and OAuth otherwise.
+    """
+    extractor = GoogleSheetsExtractor(credentials_file)
+    
+    if credentials_file and credentials_file.endswith('.json'):
+        extractor.authenticate_service_account()
+    else:
+        extractor.authenticate_oauth()
+    
+    return extractor
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_extractor(credentials_file: Optional[str]) -> GoogleSheetsExtractor:
+    return connect_extractor(credentials_file)
+
+
+def get_extractor(credentials_file: str = None) -> GoogleSheetsExtractor:
+    """
+    Authenticated GoogleSheetsExtractor shared by every update in this process
+    
+    Saves the token exchange (and any OAuth prompt) on each additional sheet.
+    """
+    with _connect_lock:
+        return _cached_extractor(credentials_file)
+
+
+def get_vector_db(pinecone_api_key: str, openai_api_key: str) -> ENTAgencyVectorDB:
+    """
+    ENTAgencyVectorDB connected to its index, shared by every update in this process
+    
+    Call close_vector_dbs() once the updates are done.
+    """
+    key = (pinecone_api_key, openai_api_key)
+    with _connect_lock:
+        db = _vector_dbs.get(key)
+        if db is None:
+            db = ENTAgencyVectorDB(
+                pinecone_api_key=pinecone_api_key,
+                openai_api_key=openai_api_key
+            )
+            try:
+                db.create_index()
+            except BaseException:
+                db.close()
+                raise
+            _vector_dbs[key] = db
+        return db
+
+
+def close_vector_dbs():
+    """Close every ENTAgencyVectorDB handed out by get_vector_db"""
+    with _connect_lock:
+        for db in _vector_dbs.values():
+            db.close()
+        _vector_dbs.clear()
 
 
 def ingest_from_google_sheets(
@@ -204,7 +384,10 @@ def ingest_from_google_sheets(
     sheet_name: str = None,
     quarter: str = None,
     creator: str = None,
-    namespace: str = None
+    namespace: str = None,
+    rows: Iterable[Dict[str, Any]] = None,
+    incremental: bool = True,
+    out: TextIO = None
 ):
     """
     Complete pipeline: Extract from Google Sheets and ingest to Pinecone
@@ -218,83 +401,145 @@ def ingest_from_google_sheets(
         quarter: Quarter label (e.g., "2024 Q1")
         creator: Creator name
         namespace: Namespace to use (auto-determined from quarter if not provided)
+        rows: Rows already read from the sheet (skips the Google Sheets read)
+        incremental: Skip rows whose stored campaign is unchanged (compared with the
+            row fingerprint saved in Pinecone); False re-ingests every row
+        out: Stream the progress report is printed to (sys.stdout if not given)
+    
+    Returns:
+        Dict with 'namespace', 'ingested', 'skipped_unchanged' and 'removed' counts, or None on failure
     """
-    print("=" * 60)
-    print("Google Sheets → Pinecone Data Ingestion")
-    print("=" * 60)
-    print()
+    # print() with file=None writes to sys.stdout, so out defaults to the console
+    emit = functools.partial(print, file=out)
     
-    # Extract from Google Sheets
-    extractor = GoogleSheetsExtractor(credentials_file)
+    emit("=" * 60)
+    emit("Google Sheets → Pinecone Data Ingestion")
+    emit("=" * 60)
+    emit()
     
-    try:
-        if credentials_file and credentials_file.endswith('.json'):
-            extractor.authenticate_service_account()
-        else:
-            extractor.authenticate_oauth()
-    except Exception as e:
-        print(f"Authentication failed: {e}")
-        print("\nFor OAuth authentication, you need to:")
-        print("1. Enable Google Sheets API in Google Cloud Console")
-        print("2. Download OAuth 2.0 credentials JSON")
-        print("3. Save as 'credentials.json'")
-        return
+    if rows is not None:
+        raw_data = rows
+    else:
+        # Extract from Google Sheets
+        try:
+            extractor = get_extractor(credentials_file)
+        except Exception as e:
+            emit(f"Authentication failed: {e}")
+            emit("\nFor OAuth authentication, you need to:")
+            emit("1. Enable Google Sheets API in Google Cloud Console")
+            emit("2. Download OAuth 2.0 credentials JSON")
+            emit("3. Save as 'credentials.json'")
+            return
+        
+        # Extract data
+        raw_data = extractor.extract_from_sheet(spreadsheet_id, sheet_name)
     
-    # Extract data
-    raw_data = extractor.extract_from_sheet(spreadsheet_id, sheet_name)
+    # Transform data (rows stream through without materializing the whole sheet)
+    emit("\nTransforming data...")
+    campaigns = transform_to_campaign_format(raw_data, quarter, creator)
     
-    if not raw_data:
-        print("No data found in spreadsheet")
+    first = next(campaigns, None)
+    if first is None:
+        emit("No data found in spreadsheet")
         return
-    
-    # Transform data
-    print("\nTransforming data...")
-    campaigns = extractor.transform_to_campaign_format(raw_data, quarter, creator)
-    print(f"✓ Transformed {len(campaigns)} campaigns")
-    
-    # Initialize Pinecone
-    print("\nConnecting to Pinecone...")
-    db = ENTAgencyVectorDB(
-        pinecone_api_key=pinecone_api_key,
-        openai_api_key=openai_api_key
-    )
-    db.create_index()
+    campaigns = chain([first], campaigns)
     
     # Determine namespace (use provided, quarter, or default)
     if namespace:
         # Use provided namespace
-        print(f"\nUsing namespace: '{namespace}' (from parameter)")
-    elif campaigns and campaigns[0].get('quarter'):
+        emit(f"\nUsing namespace: '{namespace}' (from parameter)")
+    elif first.get('quarter'):
         # Use quarter as namespace for better data isolation
-        namespace = campaigns[0]['quarter'].replace(' ', '_').lower()
-        print(f"\nUsing namespace: '{namespace}' (based on quarter)")
+        namespace = first['quarter'].replace(' ', '_').lower()
+        emit(f"\nUsing namespace: '{namespace}' (based on quarter)")
     elif quarter:
         namespace = quarter.replace(' ', '_').lower()
-        print(f"\nUsing namespace: '{namespace}' (from parameter)")
+        emit(f"\nUsing namespace: '{namespace}' (from parameter)")
     else:
         namespace = "default"
-        print(f"\nUsing default namespace: '{namespace}'")
+        emit(f"\nUsing default namespace: '{namespace}'")
+    
+    # Initialize Pinecone
+    emit("\nConnecting to Pinecone...")
+    db = get_vector_db(pinecone_api_key, openai_api_key)
+    
+    # Each row keeps one ID (its ROW_KEY_COLUMNS value, else its sheet row number; row 1 is
+    # the header), so an edited row overwrites its earlier record instead of leaving a stale
+    # duplicate behind
+    id_prefix = _row_id_prefix(spreadsheet_id, sheet_name)
+    row_numbers = count(2)
+    written_ids = set()
+    ingested = 0
+    skipped_unchanged = 0
     
-    # Ingest campaigns
-    print("\nIngesting campaigns to Pinecone...")
-    db.ingest_bulk_campaigns(campaigns, namespace=namespace)
+    # Ingest chunk by chunk so only INGEST_CHUNK_SIZE campaigns are held at once
+    for chunk in iter(lambda: list(islice(campaigns, INGEST_CHUNK_SIZE)), []):
+        for campaign in chunk:
+            row_number = next(row_numbers)
+            row_key = campaign.pop('_row_key', None)
+            campaign_id = f"{id_prefix}_key_{_id_part(row_key)}" if row_key else None
+            # A repeated key falls back to the row number rather than overwriting the first row
+            if not campaign_id or campaign_id in written_ids:
+                campaign_id = f"{id_prefix}_row{row_number}"
+            campaign['_id'] = campaign_id
+            written_ids.add(campaign_id)
+        
+        # Skip rows whose stored record was built from identical data
+        if incremental:
+            stored = db.fetch_row_hashes([campaign['_id'] for campaign in chunk], namespace)
+            changed = [campaign for campaign in chunk if stored.get(campaign['_id']) != campaign['_row_hash']]
+            skipped_unchanged += len(chunk) - len(changed)
+            chunk = changed
+        if not chunk:
+            continue
+        
+        if not ingested:
+            emit("\nIngesting campaigns to Pinecone...")
+        db.ingest_bulk_campaigns(chunk, namespace=namespace)
+        ingested += len(chunk)
     
-    print("\n" + "=" * 60)
-    print("✓ Data ingestion complete!")
-    print("=" * 60)
-    print(f"\nTotal campaigns ingested: {len(campaigns)}")
-    print(f"Namespace: {namespace}")
+    if skipped_unchanged:
+        emit(f"✓ Skipped {skipped_unchanged} unchanged campaigns")
+    
+    # Rows deleted from the sheet (and, without a row key column, rows shifted past the old
+    # last row) still have records; remove every record of this tab that this pass didn't write
+    removed = 0
+    own_id = re.compile(re.escape(id_prefix) + r'_(row\d+|key_.*)$')
+    try:
+        stale_ids = [campaign_id for campaign_id in db.list_ids(f"{id_prefix}_", namespace)
+                     if campaign_id not in written_ids and own_id.match(campaign_id)]
+        removed = db.delete_ids(stale_ids, namespace)
+    except Exception as e:
+        emit(f"⚠️  Could not remove campaigns for deleted rows: {e}")
+    if removed:
+        emit(f"✓ Removed {removed} campaigns no longer in the sheet")
+    
+    summary = {'namespace': namespace, 'ingested': ingested, 'skipped_unchanged': skipped_unchanged,
+               'removed': removed}
+    if not ingested:
+        emit("\nNo new or changed campaigns to ingest")
+        return summary
+    
+    emit("\n" + "=" * 60)
+    emit("✓ Data ingestion complete!")
+    emit("=" * 60)
+    emit(f"\nTotal campaigns ingested: {ingested}")
+    emit(f"Namespace: {namespace}")
     
     # Show stats
     stats = db.get_stats(namespace=namespace)
     if isinstance(stats, dict):
-        print(f"Vectors in namespace: {stats.get('vector_count', 0)}")
+        emit(f"Vectors in namespace: {stats.get('vector_count', 0)}")
     else:
-        print(f"Index total vectors: {stats.total_vector_count if hasattr(stats, 'total_vector_count') else 'N/A'}")
+        emit(f"Index total vectors: {stats.total_vector_count if hasattr(stats, 'total_vector_count') else 'N/A'}")
+    
+    return summary
 
 
 def main():
     """Example usage"""
+    configure_logging()
+    
     # Your spreadsheet ID from the URL:
     # https://docs.google.com/spreadsheets/d/1MBAXkNJRa1cV_mYfbWltGstaTgCTgHI65q6cbL0POTQ/edit
     SPREADSHEET_ID = "1MBAXkNJRa1cV_mYfbWltGstaTgCTgHI65q6cbL0POTQ"
@@ -308,15 +553,18 @@ def main():
         return
     
     # Run ingestion
-    ingest_from_google_sheets(
-        spreadsheet_id=SPREADSHEET_ID,
-        pinecone_api_key=PINECONE_API_KEY,
-        openai_api_key=OPENAI_API_KEY,
-        credentials_file='credentials.json',  # Your Google credentials
-        sheet_name=None,  # Will use first sheet
-        quarter="2024 Q4",  # Optional: specify quarter if not in sheet
-        creator=None  # Optional: specify creator if not in sheet
-    )
+    try:
+        ingest_from_google_sheets(
+            spreadsheet_id=SPREADSHEET_ID,
+            pinecone_api_key=PINECONE_API_KEY,
+            openai_api_key=OPENAI_API_KEY,
+            credentials_file='credentials.json',  # Your Google credentials
+            sheet_name=None,  # Will use first sheet
+            quarter="2024 Q4",  # Optional: specify quarter if not in sheet
+            creator=None  # Optional: specify creator if not in sheet
+        )
+    finally:
+        close_vector_dbs()
 
 
 if __name__ == "__main__":
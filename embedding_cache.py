@@ -0,0 +1,150 @@
+"""
+Persistent Embedding Cache for ENT Agency Campaign Data
+Stores OpenAI embeddings in SQLite so unchanged campaign text is never re-embedded
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Sequence
+
+DEFAULT_CACHE_PATH = "embedding_cache.sqlite"
+
+# Vectors kept in memory in front of SQLite (~6 KB each at 1536 dimensions)
+DEFAULT_MEMORY_SIZE = 4096
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+class CachedEmbedder:
+    """Embedding function wrapper backed by a SQLite cache keyed by (model, text) hash"""
+
+    def __init__(self, embed_fn: Callable[[List[str]], List[Sequence[float]]], model: str,
+                 path: str = DEFAULT_CACHE_PATH, memory_size: int = DEFAULT_MEMORY_SIZE):
+        """
+        Initialize the cache
+
+        Args:
+            embed_fn: Function embedding a list of texts in one request, returning vectors in order
+            model: Embedding model name (part of the cache key, so switching models never mixes vectors)
+            path: SQLite file holding the cache (created on first use)
+            memory_size: Most recently used vectors served from memory without touching SQLite
+                (0 disables the in-memory tier)
+        """
+        self.embed_fn = embed_fn
+        self.model = model
+        self.path = path
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(hash TEXT PRIMARY KEY, model TEXT, vector BLOB, created_at REAL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{text}".encode('utf-8')).hexdigest()
+
+    def _lookup(self, keys: Iterable[str]) -> Dict[str, array]:
+        keys = list(keys)
+        found = {}
+        conn = self._connection()
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i:i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", chunk
+            )
+            for key, blob in rows:
+                vector = array('f')
+                vector.frombytes(blob)
+                found[key] = vector
+        return found
+
+    def _remember(self, key: str, vector: array):
+        # Caller holds self._lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def embed(self, texts: List[str]) -> List[array]:
+        """
+        Embed texts, calling embed_fn only for texts not already in the cache
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One float32 array per input text, in input order
+        """
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            vectors = {}
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[key] = vector
+            if len(vectors) < len(keys):
+                vectors.update(self._lookup(set(keys) - vectors.keys()))
+            if self.memory_size:
+                for key, vector in vectors.items():
+                    self._remember(key, vector)
+
+            # One slot per distinct uncached text; duplicates share its vector below
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in vectors:
+                    missing.setdefault(key, text)
+            # Counted under the lock: embed() runs concurrently from the ingest upsert threads
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            fresh = self.embed_fn(list(missing.values()))
+            now = time.time()
+            rows = []
+            for key, vector in zip(missing, fresh):
+                if not isinstance(vector, array):
+                    vector = array('f', vector)
+                vectors[key] = vector
+                rows.append((key, self.model, vector.tobytes(), now))
+
+            with self._lock:
+                conn = self._connection()
+                conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+                conn.commit()
+                if self.memory_size:
+                    for key, _, _, _ in rows:
+                        self._remember(key, vectors[key])
+
+        return [vectors[key] for key in keys]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counts for this process and the number of stored vectors"""
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def close(self):
+        """Close the underlying SQLite connection"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,33 @@
+"""
+.env Loader for ENT Agency Scripts
+Reads KEY=value lines into os.environ when python-dotenv isn't installed
+"""
+
+import os
+import re
+from typing import Dict
+
+# KEY=value lines of a .env file (comments, blank and malformed lines never match)
+_ENV_LINE = re.compile(r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t]*$', re.MULTILINE)
+
+
+def load_env_file(path: str = '.env') -> Dict[str, str]:
+    """
+    Load a .env file into os.environ without python-dotenv
+    
+    Like python-dotenv, variables already set in the environment win over the file.
+    
+    Args:
+        path: .env file to read
+    
+    Returns:
+        The non-empty KEY=value pairs found in the file
+    
+    Raises:
+        OSError: If the file can't be read
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        env_vars = {key: value for key, value in _ENV_LINE.findall(f.read()) if value}
+    for key, value in env_vars.items():
+        os.environ.setdefault(key, value)
+    return env_vars
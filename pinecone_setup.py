@@ -5,10 +5,21 @@ Updated to use latest Pinecone patterns: namespaces, upsert_records, search with
 """
 
 import os
-from typing import List, Dict, Any, Optional
-import json
-from datetime import datetime
+import sys
+import hashlib
+from array import array
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
 import time
+import random
+import threading
+import logging
+import functools
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, islice
+
+from env_loader import load_env_file
 
 # Load environment variables from .env file if it exists
 try:
@@ -16,35 +27,188 @@ try:
     load_dotenv()
 except ImportError:
     # Manual .env loading if dotenv not available
-    import os
     if os.path.exists('.env'):
         try:
-            with open('.env', 'r', encoding='utf-8-sig') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        parts = line.split('=', 1)
-                        if len(parts) == 2:
-                            key = parts[0].strip()
-                            value = parts[1].strip()
-                            if key and value:
-                                os.environ[key] = value
-        except:
-            pass
+            load_env_file()
+        except OSError as e:
+            print(f"⚠️  Could not read .env: {e}")
+
+# Ingest/index progress; the command-line entry points route it to stdout via configure_logging()
+logger = logging.getLogger("pinecone_setup")
+
+# HTTP/2 for the OpenAI connection pool needs the h2 package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+from embedding_cache import CachedEmbedder, DEFAULT_CACHE_PATH
+
+
+@functools.lru_cache(maxsize=1)
+def _load_sdks():
+    """
+    Import the Pinecone and OpenAI SDKs on first use, so importing this module stays cheap
+    
+    Returns:
+        (Pinecone class, openai module, httpx module)
+    """
+    try:
+        from pinecone import Pinecone
+        import openai
+    except ImportError as e:
+        raise ImportError(
+            f"{e.name or 'pinecone/openai'} is not installed: pip install -r requirements.txt"
+        ) from e
+    
+    # httpx ships with openai
+    import httpx
+    return Pinecone, openai, httpx
+
+
+def _is_transient(error: Exception) -> bool:
+    """Rate limits, dropped connections and 5xx responses are worth retrying; other errors are not"""
+    _, openai, _ = _load_sdks()
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    # OpenAI errors carry status_code, Pinecone API exceptions carry status
+    status = getattr(error, 'status_code', None) or getattr(error, 'status', None)
+    return status in RETRY_STATUSES
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After header), if it said"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or getattr(error, 'headers', None)
+    try:
+        return float(headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _call_with_retries(fn, *args, **kwargs):
+    """
+    Call an OpenAI/Pinecone API function, retrying transient failures
+    
+    Waits follow Retry-After when the server sends it, otherwise a random exponential
+    backoff (1s up to 2^attempt seconds, capped at RETRY_MAX_WAIT) so concurrent
+    workers don't retry in lockstep.
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == RETRY_ATTEMPTS or not _is_transient(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = random.uniform(1.0, min(RETRY_MAX_WAIT, 2 ** attempt))
+            logger.warning("⚠️  %s, retrying in %.1fs (attempt %d/%d)",
+                           type(e).__name__, delay, attempt + 1, RETRY_ATTEMPTS)
+            time.sleep(delay)
+
+
+# Error text of a 400 from upsert_records/search on an index without an integrated embedding
+# model (e.g. "Integrated inference is not configured for this index")
+_NO_INTEGRATED_EMBEDDING_ERRORS = ('integrated inference', 'integrated embedding', 'field_map')
+
+
+def _needs_manual_embeddings(error: Exception) -> bool:
+    """True when upsert_records was rejected because the index has no integrated embedding model"""
+    from pinecone.exceptions import PineconeApiException
+    if not isinstance(error, PineconeApiException) or error.status != 400:
+        return False
+    body = error.body or ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    body = body.lower()
+    return any(marker in body for marker in _NO_INTEGRATED_EMBEDDING_ERRORS)
+
+
+# Attempts per API call before giving up, and the longest backoff between them (seconds)
+RETRY_ATTEMPTS = 6
+RETRY_MAX_WAIT = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# IDs per fetch() call (they are sent in the GET URL, so large lookups are split up)
+# and per delete() call (the API maximum)
+FETCH_BATCH_SIZE = 50
+DELETE_BATCH_SIZE = 1000
+
+# (field, document label) for the leading document lines, in document order; each field is
+# also copied into the record's flat metadata when non-empty
+RECORD_FIELDS = (
+    ('quarter', 'Quarter'),
+    ('creator', 'Creator'),
+    ('brand', 'Brand'),
+    ('campaign_type', 'Campaign Type'),
+    ('platform', 'Platform'),
+    ('date', 'Date'),
+)
+
+
+# (API key fingerprint, index name) of indexes already confirmed to exist in this process
+_KNOWN_INDEXES = set()
+
+
+class _MetricFieldNames(dict):
+    """metrics key -> flat record field name ("likes" -> "metric_likes"), built once per key"""
+    
+    def __missing__(self, key):
+        name = self[key] = f'metric_{key}'
+        return name
+
+
+_METRIC_FIELD_NAMES = _MetricFieldNames()
+
+
+# Spaces, slashes and tabs become underscores in campaign IDs; other control characters are dropped
+_ID_TRANS = str.maketrans({
+    ' ': '_', '/': '_', '\t': '_',
+    **{chr(code): None for code in (*range(32), 127) if code != ord('\t')}
+})
+
+
+@functools.lru_cache(maxsize=4096)
+def _id_part(name: str) -> str:
+    """Creator/brand name made ID-safe; cached since the same few names repeat across campaigns"""
+    return name.translate(_ID_TRANS)
+
+
+def _coerce_metric(value: Any):
+    """Metric value as a float when it is numeric (including numeric strings), else as a string"""
+    # Metrics are almost always numbers already, so try float() first rather than type-checking
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+@functools.lru_cache(maxsize=4)
+def _encoding_for(model: str):
+    """tiktoken encoding for an embedding model, or None without tiktoken or for unknown models"""
+    # tiktoken is optional (token-accurate lengths, otherwise characters are counted) and
+    # imported on first use, since loading it is slow
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return None
 
-try:
-    from pinecone import Pinecone
-    import openai
-except ImportError:
-    print("Installing required packages...")
-    import subprocess
-    subprocess.check_call(["pip", "install", "pinecone", "openai", "--break-system-packages"])
-    from pinecone import Pinecone
-    import openai
+
+@functools.lru_cache(maxsize=4)
+def _text_length_fn(model: str):
+    """Length function for texts sent to an embedding model: tokens with tiktoken, else characters"""
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return len
+    encode = encoding.encode
+    return lambda text: len(encode(text))
 
 
 class ENTAgencyVectorDB:
-    def __init__(self, pinecone_api_key: str, openai_api_key: str, index_name: str = "ent-agency-campaigns"):
+    def __init__(self, pinecone_api_key: str, openai_api_key: str, index_name: str = "ent-agency-campaigns",
+                 use_grpc: bool = False, cloud: str = None, region: str = None,
+                 embedding_cache_path: str = DEFAULT_CACHE_PATH):
         """
         Initialize the vector database
         
@@ -52,16 +216,99 @@ class ENTAgencyVectorDB:
             pinecone_api_key: Your Pinecone API key
             openai_api_key: Your OpenAI API key for embeddings (used if index doesn't have integrated embeddings)
             index_name: Name of the Pinecone index to create/use
+            use_grpc: Send vector upserts over gRPC (faster bulk ingest without integrated embeddings;
+                requires pip install "pinecone[grpc]"). Records and searches always use REST.
+            cloud: Serverless cloud for a newly created index (default: PINECONE_CLOUD or "aws")
+            region: Serverless region for a newly created index (default: PINECONE_REGION or
+                "us-east-1"); pick the one nearest where ingestion runs, e.g. us-east-1 next to
+                OpenAI's US endpoints or AWS us-east-* hosts, eu-west-1 for EU hosts
+            embedding_cache_path: SQLite file caching embeddings by (model, text) hash
         """
+        Pinecone, openai, httpx = _load_sdks()
         self.pc = Pinecone(api_key=pinecone_api_key)
-        self.openai_client = openai.OpenAI(api_key=openai_api_key)
+        self._api_key_hash = hashlib.sha256(pinecone_api_key.encode('utf-8')).hexdigest()
+        self.grpc_pc = None
+        if use_grpc:
+            try:
+                from pinecone.grpc import PineconeGRPC
+            except ImportError as e:
+                raise ImportError('use_grpc=True needs the gRPC extras: pip install "pinecone[grpc]"') from e
+            self.grpc_pc = PineconeGRPC(api_key=pinecone_api_key)
+        # One pooled, keep-alive connection set shared by every (concurrent) embedding request
+        self._http = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64)
+        )
+        # Retries are handled by _call_with_retries, so the SDK's own retries are turned off
+        self.openai_client = openai.OpenAI(api_key=openai_api_key, http_client=self._http, max_retries=0)
         self.index_name = index_name
+        self.cloud = cloud or os.getenv('PINECONE_CLOUD', 'aws')
+        self.region = region or os.getenv('PINECONE_REGION', 'us-east-1')
         self.index = None
+        self._grpc_index = None
+        # Set once the index turns out to have no integrated embeddings, so later upserts
+        # embed with OpenAI straight away instead of trying upsert_records first
+        self.manual_embeddings = False
+        self._mode_lock = threading.Lock()
+        # Disambiguates campaign IDs minted within the same clock tick
+        self._id_counter = count()
         
         # Embedding model configuration (for manual embeddings if needed)
         self.embedding_model = "text-embedding-3-small"
         self.embedding_dimension = 1536
+        # Longest input the model accepts; longer documents are truncated before embedding
+        self.embedding_max_tokens = 8191
+        # Texts per embeddings request (the API accepts up to 2048 inputs)
+        self.embedding_batch_size = 256
+        # Embedding requests in flight at once when a call spans several batches
+        self.embedding_concurrency = 8
+        
+        # Batches being written while the next one is prepared (also caps batches held in memory)
+        self.ingest_inflight_batches = 8
+        
+        # Pinecone REST connections kept open for reuse; at least ingest_inflight_batches so
+        # concurrent upserts never open (and handshake) throwaway connections
+        self.pinecone_pool_size = 32
+        
+        # Queries with fewer words than this are searched without reranking
+        self.rerank_min_query_words = 4
+        
+        # Seconds a describe_index_stats result is reused by get_stats (dropped after any upsert)
+        self.stats_ttl = 2.0
+        self._stats_cache = None
+        
+        # Bumped after every upsert or delete, so caches of search results can tell they are stale
+        self.write_generation = 0
+        self._write_counter = count(1)
+        
+        # Persistent cache so re-ingesting unchanged campaigns skips OpenAI
+        self.embedding_cache_path = embedding_cache_path
+        self.embedder = CachedEmbedder(self._embed_uncached, self.embedding_model, path=embedding_cache_path)
+        
+    @property
+    def vector_index(self):
+        """Index used for plain-vector upserts: gRPC when enabled (it has no records API), else REST"""
+        return self._grpc_index or self.index
+    
+    def close(self):
+        """
+        Close the pooled HTTP connections and the embedding cache
         
+        Called automatically when used as a context manager:
+            with ENTAgencyVectorDB(pinecone_api_key, openai_api_key) as db:
+                db.create_index()
+                ...
+        """
+        self._http.close()
+        self.embedder.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
     def create_index(self):
         """
         Check if index exists and connect to it.
@@ -71,13 +318,25 @@ class ENTAgencyVectorDB:
             --model llama-text-embed-v2 --field_map text=content
         
         This method will check if the index exists and connect to it.
+        Once connected, further calls return immediately without another control-plane request.
         """
-        existing_indexes = [index.name for index in self.pc.list_indexes()]
+        if self.index is not None:
+            return
+        
+        # Another instance already confirmed this index: skip the control-plane check.
+        # has_index is a single describe call; older SDKs only offer listing every index
+        index_key = (self._api_key_hash, self.index_name)
+        if index_key in _KNOWN_INDEXES:
+            index_exists = True
+        elif hasattr(self.pc, 'has_index'):
+            index_exists = self.pc.has_index(self.index_name)
+        else:
+            index_exists = any(index.name == self.index_name for index in self.pc.list_indexes())
         
-        if self.index_name not in existing_indexes:
+        if not index_exists:
             print(f"⚠️  Index '{self.index_name}' not found!")
             print("\nAccording to best practices, indexes should be created with the Pinecone CLI:")
-            print(f"  pc index create -n {self.index_name} -m cosine -c aws -r us-east-1 \\")
+            print(f"  pc index create -n {self.index_name} -m cosine -c {self.cloud} -r {self.region} \\")
             print("    --model llama-text-embed-v2 --field_map text=content")
             print("\nAlternatively, you can create it programmatically (not recommended for production):")
             print("  This will create a basic index without integrated embeddings.")
@@ -91,27 +350,93 @@ class ENTAgencyVectorDB:
                     dimension=self.embedding_dimension,
                     metric="cosine",
                     spec=ServerlessSpec(
-                        cloud="aws",
-                        region="us-east-1"
+                        cloud=self.cloud,
+                        region=self.region
                     )
                 )
                 print(f"Index '{self.index_name}' created successfully!")
+                self.manual_embeddings = True
                 print("⚠️  Note: This index uses manual embeddings. For better performance,")
                 print("   recreate with CLI using integrated embeddings (llama-text-embed-v2).")
             else:
                 raise Exception(f"Index '{self.index_name}' does not exist. Please create it using the CLI first.")
         else:
-            print(f"✓ Index '{self.index_name}' found and connected")
+            logger.info("✓ Index '%s' found and connected", self.index_name)
+        
+        pool_size = max(self.pinecone_pool_size, self.ingest_inflight_batches)
+        self.index = self.pc.Index(self.index_name, connection_pool_maxsize=pool_size)
+        _KNOWN_INDEXES.add(index_key)
+        if self.grpc_pc:
+            self._grpc_index = self.grpc_pc.Index(self.index_name)
+        
+    def get_embedding(self, text: str) -> array:
+        """Generate embedding for text using OpenAI, as a float32 array"""
+        return self.get_embeddings_batch([text])[0]
+    
+    def get_embeddings_batch(self, texts: List[str]) -> List[array]:
+        """
+        Generate embeddings for many texts, calling OpenAI only for texts not already cached
         
-        self.index = self.pc.Index(self.index_name)
+        Vectors stay float32 arrays (4 bytes per value rather than a Python float object
+        each); call .tolist() where an API needs plain lists.
         
-    def get_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using OpenAI"""
-        response = self.openai_client.embeddings.create(
-            input=text,
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One float32 array per text, in input order
+        """
+        return self.embedder.embed(texts)
+    
+    def _truncate_for_embedding(self, text: str) -> str:
+        """Cut text to embedding_max_tokens so one oversized document can't fail its whole batch"""
+        limit = self.embedding_max_tokens
+        encoding = _encoding_for(self.embedding_model)
+        if encoding is None:
+            # Without a tokenizer, assume roughly 4 characters per token
+            return text[:limit * 4]
+        # A token covers at least one UTF-8 byte, so short texts can't be over the limit
+        if len(text) * 4 <= limit:
+            return text
+        tokens = encoding.encode(text)
+        return encoding.decode(tokens[:limit]) if len(tokens) > limit else text
+    
+    def _embed_uncached(self, texts: List[str]) -> List[array]:
+        """Embed texts with OpenAI, one request per embedding_batch_size texts"""
+        if not texts:
+            return []
+        texts = [self._truncate_for_embedding(text) for text in texts]
+        if len(texts) <= self.embedding_batch_size:
+            return self._embed_request(texts)
+        
+        # Batch similar-length texts together so short texts don't wait on long ones
+        length = _text_length_fn(self.embedding_model)
+        order = sorted(range(len(texts)), key=lambda i: length(texts[i]))
+        batches = [[texts[i] for i in order[j:j + self.embedding_batch_size]]
+                   for j in range(0, len(order), self.embedding_batch_size)]
+        
+        # Requests are network-bound, so overlap them; map() keeps batches in sorted order
+        if self.embedding_concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(self.embedding_concurrency, len(batches))) as pool:
+                results = list(pool.map(self._embed_request, batches))
+        else:
+            results = [self._embed_request(batch) for batch in batches]
+        
+        embeddings = [None] * len(texts)
+        sorted_embeddings = (embedding for result in results for embedding in result)
+        for i, embedding in zip(order, sorted_embeddings):
+            embeddings[i] = embedding
+        return embeddings
+    
+    def _embed_request(self, texts: List[str]) -> List[array]:
+        """One embeddings.create call for up to embedding_batch_size texts"""
+        response = _call_with_retries(
+            self.openai_client.embeddings.create,
+            input=texts,
             model=self.embedding_model
         )
-        return response.data[0].embedding
+        ordered = sorted(response.data, key=lambda d: d.index)
+        return [array('f', d.embedding) for d in ordered]
     
     def prepare_campaign_document(self, campaign_data: Dict[str, Any]) -> str:
         """
@@ -129,36 +454,57 @@ class ENTAgencyVectorDB:
         - revenue: Revenue generated (optional)
         - notes: Any additional notes
         """
-        doc_parts = []
-        
-        # Add structured data
-        if 'quarter' in campaign_data:
-            doc_parts.append(f"Quarter: {campaign_data['quarter']}")
-        
-        if 'creator' in campaign_data:
-            doc_parts.append(f"Creator: {campaign_data['creator']}")
-        
-        if 'brand' in campaign_data:
-            doc_parts.append(f"Brand: {campaign_data['brand']}")
+        doc_text, _ = self._build_record(campaign_data, None)
+        return doc_text
+    
+    def _mark_written(self):
+        """Drop the cached index stats and bump write_generation after a write"""
+        self._stats_cache = None
+        self.write_generation = next(self._write_counter)
+    
+    def _new_campaign_id(self, campaign_data: Dict[str, Any]) -> str:
+        """Unique campaign ID: creator, brand, nanosecond timestamp and a per-instance counter"""
+        creator = _id_part(campaign_data.get('creator', 'unknown'))
+        brand = _id_part(campaign_data.get('brand', 'unknown'))
+        return f"{creator}_{brand}_{time.time_ns()}_{next(self._id_counter)}"
+    
+    def _build_record(self, campaign_data: Dict[str, Any],
+                      campaign_id: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the document text and the upsert_records record for a campaign in one pass
         
-        if 'campaign_type' in campaign_data:
-            doc_parts.append(f"Campaign Type: {campaign_data['campaign_type']}")
+        Each field is looked up once and feeds both the document line and the flat metadata
+        field (metadata must be flat, no nested objects; empty values are left out of it).
         
-        if 'platform' in campaign_data:
-            doc_parts.append(f"Platform: {campaign_data['platform']}")
+        Returns:
+            (doc_text, record) where record holds the id, doc_text as content and the metadata
+        """
+        doc_parts = []
+        record = {
+            "_id": campaign_id,
+            "content": None,  # For integrated embeddings, this field is used
+        }
         
-        if 'date' in campaign_data:
-            doc_parts.append(f"Date: {campaign_data['date']}")
+        for field, label in RECORD_FIELDS:
+            if field in campaign_data:
+                value = campaign_data[field]
+                doc_parts.append(f"{label}: {value}")
+                if value:
+                    record[field] = value
         
-        # Add metrics
+        # Metrics go into the document as a list and into the record as separate fields (flattened)
         if 'metrics' in campaign_data:
-            metrics = campaign_data['metrics']
             doc_parts.append("Metrics:")
-            for key, value in metrics.items():
+            for key, value in campaign_data['metrics'].items():
                 doc_parts.append(f"  - {key}: {value}")
+                if value is not None:
+                    record[_METRIC_FIELD_NAMES[key]] = _coerce_metric(value)
         
         if 'revenue' in campaign_data:
-            doc_parts.append(f"Revenue: ${campaign_data['revenue']}")
+            revenue = campaign_data['revenue']
+            doc_parts.append(f"Revenue: ${revenue}")
+            if revenue:
+                record['revenue'] = float(revenue)
         
         if 'content_description' in campaign_data:
             doc_parts.append(f"Content: {campaign_data['content_description']}")
@@ -166,7 +512,20 @@ class ENTAgencyVectorDB:
         if 'notes' in campaign_data:
             doc_parts.append(f"Notes: {campaign_data['notes']}")
         
-        return "\n".join(doc_parts)
+        # Source row fingerprint, so re-ingests can tell which stored records are out of date
+        if '_row_hash' in campaign_data:
+            record['row_hash'] = campaign_data['_row_hash']
+        
+        doc_text = record["content"] = "\n".join(doc_parts)
+        return doc_text, record
+    
+    def _record_to_vector(self, record: Dict[str, Any], embedding: array) -> Dict[str, Any]:
+        """Turn a record into an upsert() vector for indexes without integrated embeddings"""
+        return {
+            'id': record['_id'],
+            'values': embedding.tolist(),
+            'metadata': {k: v for k, v in record.items() if k not in ('_id', 'content')}
+        }
     
     def ingest_campaign(self, campaign_data: Dict[str, Any], campaign_id: str = None, 
                        namespace: str = "default") -> str:
@@ -186,76 +545,47 @@ class ENTAgencyVectorDB:
         
         # Generate campaign ID if not provided
         if not campaign_id:
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            creator = campaign_data.get('creator', 'unknown').replace(' ', '_').replace('/', '_')
-            brand = campaign_data.get('brand', 'unknown').replace(' ', '_').replace('/', '_')
-            campaign_id = f"{creator}_{brand}_{timestamp}"
+            campaign_id = self._new_campaign_id(campaign_data)
         
-        # Prepare document text (this will be used for embedding)
-        doc_text = self.prepare_campaign_document(campaign_data)
-        
-        # Prepare record for upsert_records
+        # Prepare document text (used for embedding) and the record for upsert_records
         # If index has integrated embeddings, we pass text; otherwise we generate embeddings
-        record = {
-            "_id": campaign_id,
-            "content": doc_text,  # For integrated embeddings, this field is used
-        }
-        
-        # Add all metadata fields (must be flat, no nested objects)
-        if campaign_data.get('quarter'):
-            record['quarter'] = campaign_data['quarter']
-        if campaign_data.get('creator'):
-            record['creator'] = campaign_data['creator']
-        if campaign_data.get('brand'):
-            record['brand'] = campaign_data['brand']
-        if campaign_data.get('campaign_type'):
-            record['campaign_type'] = campaign_data['campaign_type']
-        if campaign_data.get('platform'):
-            record['platform'] = campaign_data['platform']
-        if campaign_data.get('date'):
-            record['date'] = campaign_data['date']
-        
-        # Add metrics as separate fields (flattened)
-        if 'metrics' in campaign_data:
-            for key, value in campaign_data['metrics'].items():
-                if value is not None:
-                    record[f'metric_{key}'] = float(value) if isinstance(value, (int, float)) else str(value)
-        
-        if 'revenue' in campaign_data and campaign_data['revenue']:
-            record['revenue'] = float(campaign_data['revenue'])
+        doc_text, record = self._build_record(campaign_data, campaign_id)
         
         # Upsert using upsert_records (new API with namespace support)
-        try:
-            self.index.upsert_records(namespace, [record])
-            print(f"✓ Campaign '{campaign_id}' ingested to namespace '{namespace}'")
-        except Exception as e:
-            # Fallback: if index doesn't have integrated embeddings, use manual embeddings
-            if "field_map" in str(e).lower() or "content" in str(e).lower():
-                print(f"⚠️  Index may not have integrated embeddings. Using manual embeddings...")
-                embedding = self.get_embedding(doc_text)
-                
-                # Prepare metadata for old API
-                metadata = {k: v for k, v in record.items() if k not in ['_id', 'content']}
-                
-                self.index.upsert(vectors=[{
-                    'id': campaign_id,
-                    'values': embedding,
-                    'metadata': metadata
-                }])
-                print(f"✓ Campaign '{campaign_id}' ingested (manual embeddings)")
-            else:
-                raise
+        if not self.manual_embeddings:
+            try:
+                _call_with_retries(self.index.upsert_records, namespace, [record])
+                self._mark_written()
+                logger.debug("✓ Campaign '%s' ingested to namespace '%s'", campaign_id, namespace)
+                return campaign_id
+            except Exception as e:
+                # Fallback: if index doesn't have integrated embeddings, use manual embeddings
+                if not _needs_manual_embeddings(e):
+                    raise
+                self.manual_embeddings = True
+                logger.warning("⚠️  Index does not have integrated embeddings. Using manual embeddings...")
+        
+        embedding = self.get_embedding(doc_text)
+        _call_with_retries(self.vector_index.upsert, vectors=[self._record_to_vector(record, embedding)],
+                           namespace=namespace)
+        self._mark_written()
+        logger.debug("✓ Campaign '%s' ingested (manual embeddings)", campaign_id)
         
         return campaign_id
     
-    def ingest_bulk_campaigns(self, campaigns: List[Dict[str, Any]], 
+    def ingest_bulk_campaigns(self, campaigns: Iterable[Dict[str, Any]], 
                              namespace: str = "default",
                              batch_size: int = 96):
         """
         Ingest multiple campaigns in batches using upsert_records with namespace
         
+        Campaigns are consumed one batch at a time: while earlier batches are being written
+        (and embedded, without integrated embeddings) the next one is prepared, and at most
+        ingest_inflight_batches batches are held in memory.
+        
         Args:
-            campaigns: List of campaign data dictionaries
+            campaigns: Campaign data dictionaries (a list or any iterable, e.g. a generator);
+                a campaign with an '_id' is stored under that ID, replacing any earlier version
             namespace: Namespace to store campaigns (default: "default", recommended: use quarter)
             batch_size: Number of campaigns to process per batch (max 96 for text records)
         """
@@ -265,88 +595,79 @@ class ENTAgencyVectorDB:
         # Limit batch size for text records
         if batch_size > 96:
             batch_size = 96
-            print(f"⚠️  Batch size limited to 96 (max for text records)")
-        
-        total = len(campaigns)
-        print(f"Ingesting {total} campaigns to namespace '{namespace}' in batches of {batch_size}...")
+            logger.warning("⚠️  Batch size limited to 96 (max for text records)")
+        
+        total = len(campaigns) if hasattr(campaigns, '__len__') else None
+        batch_count = (total - 1) // batch_size + 1 if total else None
+        logger.info("Ingesting %s campaigns to namespace '%s' in batches of %d...",
+                    total if total is not None else 'all', namespace, batch_size)
+        
+        campaign_iter = iter(campaigns)
+        batches = iter(lambda: list(islice(campaign_iter, batch_size)), [])
+        in_flight = deque()
+        ingested = 0
+        # Bound once instead of per campaign in the loop below
+        new_id = self._new_campaign_id
+        build_record = self._build_record
+        
+        def finish(batch_num, size, upsert):
+            # Progress is reported from this thread, in batch order, once the batch is written
+            progress = f"{batch_num}/{batch_count}" if batch_count else f"{batch_num}"
+            if upsert.result():
+                logger.info("✓ Processed batch %s (%d records, manual embeddings)", progress, size)
+            else:
+                logger.info("✓ Processed batch %s (%d records)", progress, size)
         
-        for i in range(0, total, batch_size):
-            batch = campaigns[i:i+batch_size]
-            records = []
-            
-            for idx, campaign in enumerate(batch):
-                # Generate campaign ID
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")[:-3]  # Include milliseconds
-                creator = campaign.get('creator', 'unknown').replace(' ', '_').replace('/', '_')
-                brand = campaign.get('brand', 'unknown').replace(' ', '_').replace('/', '_')
-                campaign_id = f"{creator}_{brand}_{timestamp}_{idx}"
+        with ThreadPoolExecutor(max_workers=self.ingest_inflight_batches) as pool:
+            for batch_num, batch in enumerate(batches, 1):
+                records = [
+                    build_record(campaign, campaign.get('_id') or new_id(campaign))[1] for campaign in batch
+                ]
                 
-                # Prepare document text
-                doc_text = self.prepare_campaign_document(campaign)
+                in_flight.append((batch_num, len(records), pool.submit(self._upsert_batch, records, namespace)))
+                ingested += len(records)
                 
-                # Prepare record
-                record = {
-                    "_id": campaign_id,
-                    "content": doc_text,
-                }
-                
-                # Add metadata fields (flat structure only)
-                if campaign.get('quarter'):
-                    record['quarter'] = campaign['quarter']
-                if campaign.get('creator'):
-                    record['creator'] = campaign['creator']
-                if campaign.get('brand'):
-                    record['brand'] = campaign['brand']
-                if campaign.get('campaign_type'):
-                    record['campaign_type'] = campaign['campaign_type']
-                if campaign.get('platform'):
-                    record['platform'] = campaign['platform']
-                if campaign.get('date'):
-                    record['date'] = campaign['date']
-                
-                # Add metrics
-                if 'metrics' in campaign:
-                    for key, value in campaign['metrics'].items():
-                        if value is not None:
-                            record[f'metric_{key}'] = float(value) if isinstance(value, (int, float)) else str(value)
-                
-                if 'revenue' in campaign and campaign['revenue']:
-                    record['revenue'] = float(campaign['revenue'])
-                
-                records.append(record)
+                if len(in_flight) >= self.ingest_inflight_batches:
+                    finish(*in_flight.popleft())
             
-            # Upsert batch using upsert_records
+            # Surface any failed upsert before reporting success
+            while in_flight:
+                finish(*in_flight.popleft())
+        
+        logger.info("✓ All %d campaigns ingested successfully to namespace '%s'!", ingested, namespace)
+    
+    def _upsert_batch(self, records: List[Dict[str, Any]], namespace: str) -> bool:
+        """
+        Write one batch of records, embedding them manually if the index has no integrated embeddings
+        
+        Returns:
+            True if the batch was embedded manually
+        """
+        if not self.manual_embeddings:
             try:
-                self.index.upsert_records(namespace, records)
-                print(f"✓ Processed batch {i//batch_size + 1}/{(total-1)//batch_size + 1} ({len(records)} records)")
+                _call_with_retries(self.index.upsert_records, namespace, records)
+                self._mark_written()
+                return False
             except Exception as e:
                 # Fallback to manual embeddings if needed
-                if "field_map" in str(e).lower() or "content" in str(e).lower():
-                    print(f"⚠️  Using manual embeddings for batch {i//batch_size + 1}...")
-                    vectors = []
-                    for record in records:
-                        embedding = self.get_embedding(record['content'])
-                        metadata = {k: v for k, v in record.items() if k not in ['_id', 'content']}
-                        vectors.append({
-                            'id': record['_id'],
-                            'values': embedding,
-                            'metadata': metadata
-                        })
-                    self.index.upsert(vectors=vectors)
-                    print(f"✓ Processed batch {i//batch_size + 1} (manual embeddings)")
-                else:
+                if not _needs_manual_embeddings(e):
                     raise
-            
-            # Small delay to avoid rate limits
-            if i + batch_size < total:
-                time.sleep(0.1)
-        
-        print(f"✓ All {total} campaigns ingested successfully to namespace '{namespace}'!")
+                self.manual_embeddings = True
+                logger.debug("Using manual embeddings from now on")
+        
+        embeddings = self.get_embeddings_batch([record['content'] for record in records])
+        vectors = [self._record_to_vector(record, embedding)
+                   for record, embedding in zip(records, embeddings)]
+        _call_with_retries(self.vector_index.upsert, vectors=vectors, namespace=namespace)
+        self._mark_written()
+        return True
     
     def search(self, query_text: str, top_k: int = 10, 
               namespace: str = "default",
               filter_dict: Optional[Dict] = None,
-              use_reranking: bool = True) -> List[Dict]:
+              use_reranking: bool = True,
+              rerank_candidates: int = 20,
+              query_vector: Optional[array] = None) -> List[Dict]:
         """
         Search the vector database using the new search() API with reranking
         
@@ -355,7 +676,11 @@ class ENTAgencyVectorDB:
             top_k: Number of results to return
             namespace: Namespace to search in (default: "default")
             filter_dict: Optional metadata filters (e.g., {'quarter': '2024 Q1'})
-            use_reranking: Whether to use reranking for better results (recommended)
+            use_reranking: Whether to use reranking for better results (recommended); skipped for
+                keyword-style queries shorter than rerank_min_query_words
+            rerank_candidates: Extra candidates fetched for the reranker beyond top_k (at most top_k)
+            query_vector: Precomputed embedding of query_text for indexes without integrated
+                embeddings (e.g. from one get_embeddings_batch call for several queries)
         
         Returns:
             List of matching campaigns with scores
@@ -363,9 +688,14 @@ class ENTAgencyVectorDB:
         if not self.index:
             raise Exception("Index not initialized. Call create_index() first.")
         
+        # Short keyword queries gain little from the cross-encoder, so they skip it
+        if use_reranking and len(query_text.split()) < self.rerank_min_query_words:
+            use_reranking = False
+        
         # Build query parameters
         query_params = {
-            "top_k": top_k * 2 if use_reranking else top_k,  # Get more candidates for reranking
+            # Get more candidates for reranking (grows additively, bounded by 2x top_k)
+            "top_k": top_k + min(top_k, rerank_candidates) if use_reranking else top_k,
             "inputs": {
                 "text": query_text  # For integrated embeddings
             }
@@ -384,58 +714,66 @@ class ENTAgencyVectorDB:
                 "rank_fields": ["content"]
             }
         
-        try:
-            # Use search() method (new API)
-            results = self.index.search(
-                namespace=namespace,
-                query=query_params,
-                rerank=rerank_params
-            )
-            
-            # Format results from new API structure
-            formatted_results = []
-            if 'result' in results and 'hits' in results['result']:
-                for hit in results['result']['hits']:
-                    formatted_results.append({
-                        'id': hit.get('_id', ''),
-                        'score': hit.get('_score', 0.0),
-                        'metadata': hit.get('fields', {})
-                    })
-            else:
-                # Fallback for different response structure
-                for hit in results.get('hits', []):
-                    formatted_results.append({
-                        'id': hit.get('_id', ''),
-                        'score': hit.get('_score', 0.0),
-                        'metadata': hit.get('fields', {})
-                    })
-            
-            return formatted_results
-            
-        except Exception as e:
-            # Fallback to old query() API if search() fails
-            if "search" in str(e).lower() or "query" in str(e).lower():
-                print(f"⚠️  Using fallback query() method (index may not support new search API)")
-                query_embedding = self.get_embedding(query_text)
-                
-                results = self.index.query(
-                    vector=query_embedding,
-                    top_k=top_k,
-                    include_metadata=True,
-                    filter=filter_dict
+        if not self.manual_embeddings:
+            try:
+                # Use search() method (new API)
+                results = self.index.search(
+                    namespace=namespace,
+                    query=query_params,
+                    rerank=rerank_params
                 )
                 
+                # Format results from new API structure
                 formatted_results = []
-                for match in results.get('matches', []):
-                    formatted_results.append({
-                        'id': match['id'],
-                        'score': match['score'],
-                        'metadata': match.get('metadata', {})
-                    })
+                if 'result' in results and 'hits' in results['result']:
+                    for hit in results['result']['hits']:
+                        formatted_results.append({
+                            'id': hit.get('_id', ''),
+                            'score': hit.get('_score', 0.0),
+                            'metadata': hit.get('fields', {})
+                        })
+                else:
+                    # Fallback for different response structure
+                    for hit in results.get('hits', []):
+                        formatted_results.append({
+                            'id': hit.get('_id', ''),
+                            'score': hit.get('_score', 0.0),
+                            'metadata': hit.get('fields', {})
+                        })
                 
                 return formatted_results
-            else:
-                raise
+                
+            except Exception as e:
+                # Without an embedding model the index can't search by text; fall back to query()
+                if not _needs_manual_embeddings(e):
+                    raise
+                # Concurrent searches can all hit this, but only the first reports the switch
+                with self._mode_lock:
+                    switched = not self.manual_embeddings
+                    self.manual_embeddings = True
+                if switched:
+                    logger.warning("⚠️  Index has no integrated embeddings, searching with query() instead")
+        
+        if query_vector is None:
+            query_vector = self.get_embedding(query_text)
+        
+        results = self.index.query(
+            vector=query_vector.tolist(),
+            top_k=top_k,
+            include_metadata=True,
+            filter=filter_dict,
+            namespace=namespace
+        )
+        
+        formatted_results = []
+        for match in results.get('matches', []):
+            formatted_results.append({
+                'id': match['id'],
+                'score': match['score'],
+                'metadata': match.get('metadata', {})
+            })
+        
+        return formatted_results
     
     def query(self, query_text: str, top_k: int = 10, filter_dict: Dict = None) -> List[Dict]:
         """
@@ -451,12 +789,75 @@ class ENTAgencyVectorDB:
         """
         return self.search(query_text, top_k=top_k, filter_dict=filter_dict)
     
+    def fetch_row_hashes(self, ids: List[str], namespace: str = "default") -> Dict[str, str]:
+        """
+        Get the source row fingerprints stored with existing campaigns
+        
+        Args:
+            ids: Campaign IDs to look up (fetched FETCH_BATCH_SIZE at a time)
+            namespace: Namespace holding the campaigns
+        
+        Returns:
+            Dict mapping each stored ID to its row_hash (missing IDs are left out)
+        """
+        if not self.index:
+            raise Exception("Index not initialized. Call create_index() first.")
+        
+        row_hashes = {}
+        for start in range(0, len(ids), FETCH_BATCH_SIZE):
+            response = _call_with_retries(self.index.fetch, ids=ids[start:start + FETCH_BATCH_SIZE],
+                                          namespace=namespace)
+            for vector_id, vector in response.vectors.items():
+                if vector.metadata and 'row_hash' in vector.metadata:
+                    row_hashes[vector_id] = vector.metadata['row_hash']
+        return row_hashes
+    
+    def list_ids(self, prefix: str, namespace: str = "default") -> Iterator[str]:
+        """
+        Iterate over the stored campaign IDs that start with prefix (serverless indexes only)
+        
+        Args:
+            prefix: ID prefix to match
+            namespace: Namespace holding the campaigns
+        """
+        if not self.index:
+            raise Exception("Index not initialized. Call create_index() first.")
+        
+        for page in self.index.list(prefix=prefix, namespace=namespace):
+            yield from page
+    
+    def delete_ids(self, ids: List[str], namespace: str = "default") -> int:
+        """
+        Delete campaigns by ID
+        
+        Args:
+            ids: Campaign IDs to delete (deleted DELETE_BATCH_SIZE at a time)
+            namespace: Namespace holding the campaigns
+        
+        Returns:
+            Number of IDs deleted
+        """
+        if not self.index:
+            raise Exception("Index not initialized. Call create_index() first.")
+        
+        for start in range(0, len(ids), DELETE_BATCH_SIZE):
+            _call_with_retries(self.index.delete, ids=ids[start:start + DELETE_BATCH_SIZE],
+                               namespace=namespace)
+        if ids:
+            self._mark_written()
+        return len(ids)
+    
     def get_stats(self, namespace: str = None):
-        """Get index statistics"""
+        """Get index statistics (reused for stats_ttl seconds, so polling doesn't flood the API)"""
         if not self.index:
             raise Exception("Index not initialized. Call create_index() first.")
         
-        stats = self.index.describe_index_stats()
+        cached = self._stats_cache
+        if cached and time.monotonic() - cached[0] < self.stats_ttl:
+            stats = cached[1]
+        else:
+            stats = self.index.describe_index_stats()
+            self._stats_cache = (time.monotonic(), stats)
         
         # If namespace specified, return stats for that namespace
         if namespace and hasattr(stats, 'namespaces'):
@@ -470,8 +871,15 @@ class ENTAgencyVectorDB:
         return stats
 
 
+def configure_logging(level: int = logging.INFO):
+    """Print ingest/index progress to stdout as plain messages (for command-line entry points)"""
+    logging.basicConfig(stream=sys.stdout, format="%(message)s")
+    logger.setLevel(level)
+
+
 def main():
     """Example usage"""
+    configure_logging()
     print("=" * 60)
     print("ENT Agency Pinecone Vector Database Setup")
     print("=" * 60)
@@ -508,7 +916,7 @@ def main():
         print("✓ Connected to Pinecone index successfully!")
         print()
         print("📝 RECOMMENDED: For best performance, create index with integrated embeddings:")
-        print("   pc index create -n ent-agency-campaigns -m cosine -c aws -r us-east-1 \\")
+        print(f"   pc index create -n ent-agency-campaigns -m cosine -c {db.cloud} -r {db.region} \\")
         print("     --model llama-text-embed-v2 --field_map text=content")
         print()
         print("Next steps:")
@@ -0,0 +1,163 @@
+"""
+Search Result Cache for ENT Agency Campaign Queries
+Serves repeat (and, optionally, near-duplicate) queries from memory instead of Pinecone
+"""
+
+import json
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from operator import mul
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_ENTRIES = 1000
+# Seconds; kept short because another process (e.g. auto_update.py) may re-ingest at any time
+DEFAULT_TTL = 5 * 60
+
+# Cosine similarity above which a different query counts as the same question
+DEFAULT_SEMANTIC_THRESHOLD = 0.85
+
+
+def _unit(vector: Sequence[float]) -> array:
+    norm = math.sqrt(sum(map(mul, vector, vector))) or 1.0
+    return array('f', (x / norm for x in vector))
+
+
+class QueryCache:
+    """
+    LRU cache of search results with a TTL, keyed by the normalized query and search options
+
+    With an embed_fn, a miss on the exact query also checks earlier queries with the same
+    namespace, filters, top_k and reranking whose embeddings are within semantic_threshold
+    cosine similarity, so "Thorne campaigns" can answer "campaigns for Thorne".
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL,
+                 embed_fn: Optional[Callable[[List[str]], List[Sequence[float]]]] = None,
+                 semantic_threshold: float = DEFAULT_SEMANTIC_THRESHOLD,
+                 generation_fn: Optional[Callable[[], int]] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Most cached searches kept; the least recently used is evicted first
+            ttl: Seconds a cached result stays valid
+            embed_fn: Function embedding a list of query texts (enables the semantic tier)
+            semantic_threshold: Minimum cosine similarity for a semantic hit
+            generation_fn: Function returning a counter that changes whenever the index is
+                written (e.g. ENTAgencyVectorDB.write_generation); results cached before a
+                change are dropped
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed_fn = embed_fn
+        self.semantic_threshold = semantic_threshold
+        self.generation_fn = generation_fn
+        self._generation = generation_fn() if generation_fn else None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        # key -> (results, stored_at, unit query embedding or None)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query: str, namespace: str, filters: Optional[Dict], top_k: int,
+             use_reranking: bool) -> Tuple[str, Tuple]:
+        # Filters may nest ($in lists, $gte dicts), so they are keyed by their canonical JSON
+        scope = (namespace, json.dumps(filters or {}, sort_keys=True, default=str), top_k, use_reranking)
+        return " ".join(query.lower().split()), scope
+
+    def _drop_if_written(self) -> bool:
+        """Clear the cache if the index was written since the last check (caller holds the lock)
+
+        Returns:
+            True if the cache was cleared
+        """
+        if self.generation_fn is None:
+            return False
+        generation = self.generation_fn()
+        if generation == self._generation:
+            return False
+        self._entries.clear()
+        self._generation = generation
+        return True
+
+    def _embed(self, query: str) -> array:
+        return _unit(self.embed_fn([query])[0])
+
+    def get(self, query: str, namespace: str, filters: Optional[Dict], top_k: int,
+            use_reranking: bool) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results for a search
+
+        Returns:
+            The cached results, or None on a miss
+        """
+        key = self._key(query, namespace, filters, top_k, use_reranking)
+        now = time.monotonic()
+
+        with self._lock:
+            self._drop_if_written()
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[1] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[0])
+                del self._entries[key]
+
+            candidates = [
+                (cached_key, cached_entry) for cached_key, cached_entry in self._entries.items()
+                if cached_key[1] == key[1] and cached_entry[2] is not None and now - cached_entry[1] < self.ttl
+            ] if self.embed_fn else None
+
+        if candidates:
+            embedding = self._embed(query)
+            score, best_key, best_entry = max(
+                ((sum(map(mul, embedding, cached_entry[2])), cached_key, cached_entry)
+                 for cached_key, cached_entry in candidates),
+                key=lambda item: item[0]
+            )
+            if score >= self.semantic_threshold:
+                with self._lock:
+                    if best_key in self._entries:
+                        self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                return list(best_entry[0])
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query: str, namespace: str, filters: Optional[Dict], top_k: int,
+            use_reranking: bool, results: List[Dict[str, Any]]):
+        """Store the results of a search"""
+        key = self._key(query, namespace, filters, top_k, use_reranking)
+        embedding = self._embed(query) if self.embed_fn else None
+
+        with self._lock:
+            # A write while this search ran may already have made its results stale
+            if self._drop_if_written():
+                return
+            self._entries[key] = (list(results), time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result (e.g. after new campaigns were ingested)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counts and the number of cached searches"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'entries': len(self._entries)
+            }
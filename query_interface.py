@@ -3,9 +3,18 @@ Query Interface for ENT Agency Campaign Vector Database
 Natural language search interface for campaign insights
 """
 
+import io
 import os
-from typing import List, Dict, Any
-from pinecone_setup import ENTAgencyVectorDB
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from statistics import fmean, stdev
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from query_cache import QueryCache
+
+if TYPE_CHECKING:
+    from pinecone_setup import ENTAgencyVectorDB
 
 # Load environment variables from .env file if it exists
 try:
@@ -14,22 +23,69 @@ try:
 except ImportError:
     pass  # dotenv is optional
 
+# Quarter ("Q1", "q3") and year ("2024") mentioned anywhere in a free-text query, in either order
+_QUARTER_RE = re.compile(r'(?<![A-Za-z])[Qq]([1-4])(?!\d)')
+_YEAR_RE = re.compile(r'(?<!\d)(202[3-5])(?!\d)')
+
+# (metadata field, label) shown for each search result, in display order
+PRINT_FIELDS = (
+    ('quarter', '📅 Quarter'),
+    ('creator', '👤 Creator'),
+    ('brand', '🏢 Brand'),
+    ('campaign_type', '📱 Type'),
+    ('platform', '🌐 Platform'),
+    ('date', '📆 Date'),
+)
+_PRINT_FIELD_KEYS = frozenset([key for key, _ in PRINT_FIELDS] + ['revenue'])
+
+# Interactive inputs answered without searching
+TRIVIAL_QUERIES = frozenset(['hi', 'hello', 'hey', 'help', 'test', 'thanks', 'thank you', 'ok', 'yes', 'no'])
+
+
+def _metric_values(results: List[Dict], metric: str) -> List[float]:
+    """Numeric values of one metric (e.g. "engagement") across search results"""
+    values = [result.get('metadata', {}).get(f'metric_{metric}') for result in results]
+    return [value for value in values if isinstance(value, (int, float))]
+
 
 class CampaignQueryInterface:
     """Interactive query interface for campaign data"""
     
-    def __init__(self, pinecone_api_key: str, openai_api_key: str, default_namespace: str = "default"):
-        self.db = ENTAgencyVectorDB(
-            pinecone_api_key=pinecone_api_key,
-            openai_api_key=openai_api_key
-        )
+    def __init__(self, pinecone_api_key: str = None, openai_api_key: str = None,
+                 default_namespace: str = "default", semantic_cache: bool = False,
+                 db: Optional['ENTAgencyVectorDB'] = None, verbose: bool = True):
+        """
+        Args:
+            pinecone_api_key: Your Pinecone API key (not needed when db is given)
+            openai_api_key: Your OpenAI API key (not needed when db is given)
+            default_namespace: Namespace searched when none is given
+            semantic_cache: Also answer queries similar to an earlier one from the result cache
+                (embeds each new query with OpenAI; repeat queries are cached either way)
+            db: Existing vector database to share (e.g. one handle for many interfaces in a script)
+            verbose: Print reports from the query_* / analyze / compare methods; with False they
+                skip all formatting and only return their results (for scripts)
+        """
+        if db is None:
+            # Imported here so loading this module (e.g. for --help or menus) stays fast
+            from pinecone_setup import ENTAgencyVectorDB
+            db = ENTAgencyVectorDB(
+                pinecone_api_key=pinecone_api_key,
+                openai_api_key=openai_api_key
+            )
+        self.db = db
+        # No-op when the shared db is already connected
         self.db.create_index()
         self.default_namespace = default_namespace
+        self.verbose = verbose
+        # Cached results are dropped whenever this db writes to the index
+        self.cache = QueryCache(embed_fn=self.db.get_embeddings_batch if semantic_cache else None,
+                                generation_fn=lambda: self.db.write_generation)
     
     def search(self, query: str, top_k: int = 10, 
                namespace: str = None, 
                filters: Dict = None,
-               use_reranking: bool = True) -> List[Dict]:
+               use_reranking: bool = True,
+               query_vector=None) -> List[Dict]:
         """
         Search campaigns using natural language with reranking
         
@@ -39,6 +95,7 @@ class CampaignQueryInterface:
             namespace: Namespace to search (default: self.default_namespace)
             filters: Optional metadata filters
             use_reranking: Whether to use reranking (recommended)
+            query_vector: Precomputed query embedding (only used without integrated embeddings)
         
         Returns:
             List of matching campaigns
@@ -46,13 +103,19 @@ class CampaignQueryInterface:
         if namespace is None:
             namespace = self.default_namespace
         
+        results = self.cache.get(query, namespace, filters, top_k, use_reranking)
+        if results is not None:
+            return results
+        
         results = self.db.search(
             query_text=query, 
             top_k=top_k, 
             namespace=namespace,
             filter_dict=filters,
-            use_reranking=use_reranking
+            use_reranking=use_reranking,
+            query_vector=query_vector
         )
+        self.cache.put(query, namespace, filters, top_k, use_reranking, results)
         return results
     
     def format_results(self, results: List[Dict], show_full: bool = False):
@@ -61,66 +124,60 @@ class CampaignQueryInterface:
             print("\nNo results found.")
             return
         
-        print(f"\n{'='*80}")
-        print(f"Found {len(results)} results")
-        print(f"{'='*80}\n")
+        # Build the whole listing in memory and write it to stdout once
+        out = io.StringIO()
+        
+        print(f"\n{'='*80}", file=out)
+        print(f"Found {len(results)} results", file=out)
+        print(f"{'='*80}\n", file=out)
         
         for i, result in enumerate(results, 1):
             metadata = result.get('metadata', {})
             score = result.get('score', 0.0)
             
-            print(f"Result #{i} (Relevance: {score:.3f})")
-            print("-" * 80)
+            print(f"Result #{i} (Relevance: {score:.3f})", file=out)
+            print("-" * 80, file=out)
             
-            # Show key fields (handle both old and new API formats)
-            quarter = metadata.get('quarter', '')
-            if quarter:
-                print(f"📅 Quarter: {quarter}")
-            
-            creator = metadata.get('creator', '')
-            if creator:
-                print(f"👤 Creator: {creator}")
-            
-            brand = metadata.get('brand', '')
-            if brand:
-                print(f"🏢 Brand: {brand}")
-            
-            campaign_type = metadata.get('campaign_type', '')
-            if campaign_type:
-                print(f"📱 Type: {campaign_type}")
-            
-            platform = metadata.get('platform', '')
-            if platform:
-                print(f"🌐 Platform: {platform}")
+            # Sort the metadata into key fields and metrics in one pass
+            fields = {}
+            metrics = []
+            for key, value in metadata.items():
+                if key.startswith('metric_'):
+                    metrics.append((key[7:], value))
+                elif key in _PRINT_FIELD_KEYS:
+                    fields[key] = value
             
-            date = metadata.get('date', '')
-            if date:
-                print(f"📆 Date: {date}")
+            # Show key fields (handle both old and new API formats)
+            for key, label in PRINT_FIELDS:
+                value = fields.get(key)
+                if value:
+                    print(f"{label}: {value}", file=out)
             
             # Show metrics if available
-            metrics = {k.replace('metric_', ''): v for k, v in metadata.items() if k.startswith('metric_')}
             if metrics:
-                print(f"📊 Metrics:")
-                for metric_name, metric_value in metrics.items():
+                print(f"📊 Metrics:", file=out)
+                for metric_name, metric_value in metrics:
                     if isinstance(metric_value, (int, float)):
-                        print(f"   • {metric_name}: {metric_value:,}")
+                        print(f"   • {metric_name}: {metric_value:,}", file=out)
                     else:
-                        print(f"   • {metric_name}: {metric_value}")
+                        print(f"   • {metric_name}: {metric_value}", file=out)
             
-            revenue = metadata.get('revenue')
+            revenue = fields.get('revenue')
             if revenue:
                 try:
-                    print(f"💰 Revenue: ${float(revenue):,.2f}")
+                    print(f"💰 Revenue: ${float(revenue):,.2f}", file=out)
                 except:
-                    print(f"💰 Revenue: {revenue}")
+                    print(f"💰 Revenue: {revenue}", file=out)
             
             if show_full:
                 content = metadata.get('content', metadata.get('text', ''))
                 if content:
-                    print(f"\n📄 Full Content:")
-                    print(content)
+                    print(f"\n📄 Full Content:", file=out)
+                    print(content, file=out)
             
-            print("\n")
+            print("\n", file=out)
+        
+        sys.stdout.write(out.getvalue())
     
     def query_best_performing(self, metric: str = "engagement", quarter: str = None, top_k: int = 5, namespace: str = None):
         """Find best performing campaigns by a specific metric"""
@@ -137,13 +194,14 @@ class CampaignQueryInterface:
         
         results = self.search(query, top_k=top_k, namespace=namespace, filters=filters)
         
-        print(f"\n🏆 Top {top_k} campaigns by {metric}")
-        if quarter:
-            print(f"   Filtered by: {quarter}")
-        if namespace:
-            print(f"   Namespace: {namespace}")
-        
-        self.format_results(results)
+        if self.verbose:
+            print(f"\n🏆 Top {top_k} campaigns by {metric}")
+            if quarter:
+                print(f"   Filtered by: {quarter}")
+            if namespace:
+                print(f"   Namespace: {namespace}")
+            
+            self.format_results(results)
         return results
     
     def query_by_brand(self, brand_name: str, top_k: int = 10, namespace: str = None):
@@ -156,8 +214,9 @@ class CampaignQueryInterface:
         
         results = self.search(query, top_k=top_k, namespace=namespace, filters=filters)
         
-        print(f"\n🏢 Campaigns for {brand_name}")
-        self.format_results(results)
+        if self.verbose:
+            print(f"\n🏢 Campaigns for {brand_name}")
+            self.format_results(results)
         return results
     
     def query_by_creator(self, creator_name: str, top_k: int = 10, namespace: str = None):
@@ -170,55 +229,119 @@ class CampaignQueryInterface:
         
         results = self.search(query, top_k=top_k, namespace=namespace, filters=filters)
         
-        print(f"\n👤 Campaigns by {creator_name}")
-        self.format_results(results)
+        if self.verbose:
+            print(f"\n👤 Campaigns by {creator_name}")
+            self.format_results(results)
         return results
     
-    def analyze_trends(self, topic: str, quarters: List[str] = None):
-        """Analyze trends across quarters"""
+    def _existing_namespaces(self) -> Optional[set]:
+        """Namespaces present in the index, or None if the index stats don't list them"""
+        namespaces = getattr(self.db.get_stats(), 'namespaces', None)
+        return set(namespaces) if namespaces is not None else None
+    
+    def analyze_trends(self, topic: str, quarters: List[str] = None, namespace: str = None):
+        """
+        Analyze trends across quarters
+        
+        Args:
+            topic: What to look for in each quarter's campaigns
+            quarters: Quarters to compare (default: 2023 Q3 through 2025 Q3)
+            namespace: Namespace holding every quarter's campaigns. By default each quarter is
+                searched in its own namespace (as data_ingestion stores them), or in the default
+                namespace if the index has no namespace for it.
+        
+        Returns:
+            Dict mapping each quarter to its matching campaigns
+        """
         if not quarters:
             quarters = ["2023 Q3", "2023 Q4", "2024 Q1", "2024 Q2", "2024 Q3", "2024 Q4", "2025 Q1", "2025 Q2", "2025 Q3"]
         
-        print(f"\n📈 Trend Analysis: {topic}")
-        print("="*80)
+        if self.verbose:
+            print(f"\n📈 Trend Analysis: {topic}")
+            print("="*80)
+        
+        if namespace is not None:
+            namespaces = [namespace] * len(quarters)
+        else:
+            existing = self._existing_namespaces()
+            namespaces = [
+                quarter_namespace if existing is None or quarter_namespace in existing else self.default_namespace
+                for quarter_namespace in (quarter.replace(' ', '_').lower() for quarter in quarters)
+            ]
         
-        for quarter in quarters:
-            filters = {'quarter': quarter}
-            namespace = quarter.replace(' ', '_').lower()
-            results = self.search(topic, top_k=5, namespace=namespace, filters=filters)
+        # Without integrated embeddings every quarter shares one topic embedding, made up front
+        topic_vector = self.db.get_embedding(topic) if self.db.manual_embeddings else None
+        
+        if len(set(namespaces)) == 1:
+            # All quarters live in one namespace: one search over all of them, then the top 5 per quarter
+            results = self.search(topic, top_k=5 * len(quarters), namespace=namespaces[0],
+                                  filters={'quarter': {'$in': quarters}}, query_vector=topic_vector)
+            by_quarter = defaultdict(list)
+            for result in results:
+                by_quarter[result.get('metadata', {}).get('quarter')].append(result)
+            quarter_results = [by_quarter[quarter][:5] for quarter in quarters]
+        else:
+            # Quarters are independent searches, so they all run at once
+            def search_quarter(quarter, quarter_namespace):
+                return self.search(topic, top_k=5, namespace=quarter_namespace, filters={'quarter': quarter},
+                                   query_vector=topic_vector)
             
-            if results:
-                print(f"\n{quarter}: {len(results)} relevant campaigns")
-                # Calculate average metrics if available
-                total_engagement = 0
-                count = 0
-                for result in results:
-                    metadata = result.get('metadata', {})
-                    if 'metric_engagement' in metadata:
-                        total_engagement += metadata['metric_engagement']
-                        count += 1
-                
-                if count > 0:
-                    avg_engagement = total_engagement / count
-                    print(f"   Average Engagement: {avg_engagement:,.0f}")
+            with ThreadPoolExecutor(max_workers=len(quarters)) as pool:
+                quarter_results = list(pool.map(search_quarter, quarters, namespaces))
+        
+        if self.verbose:
+            for quarter, results in zip(quarters, quarter_results):
+                if results:
+                    print(f"\n{quarter}: {len(results)} relevant campaigns")
+                    # Calculate average metrics if available (non-numeric values are left out)
+                    engagement = _metric_values(results, 'engagement')
+                    
+                    if engagement:
+                        avg_engagement = fmean(engagement)
+                        print(f"   Average Engagement: {avg_engagement:,.0f}")
+        
+        return dict(zip(quarters, quarter_results))
     
     def compare_creators(self, creator1: str, creator2: str, metric: str = "engagement", namespace: str = None):
-        """Compare performance between two creators"""
-        print(f"\n⚖️  Comparing {creator1} vs {creator2}")
-        print("="*80)
+        """
+        Compare performance between two creators
+        
+        Returns:
+            (creator1's campaigns, creator2's campaigns)
+        """
+        if self.verbose:
+            print(f"\n⚖️  Comparing {creator1} vs {creator2}")
+            print("="*80)
         
         if namespace is None:
             namespace = self.default_namespace
         
-        # Get campaigns for each creator
-        results1 = self.search(f"{creator1} {metric}", top_k=10, namespace=namespace, filters={'creator': creator1})
-        results2 = self.search(f"{creator2} {metric}", top_k=10, namespace=namespace, filters={'creator': creator2})
+        query1, query2 = f"{creator1} {metric}", f"{creator2} {metric}"
         
-        print(f"\n{creator1}:")
-        print(f"  Total campaigns: {len(results1)}")
+        # Without integrated embeddings both queries are embedded in a single request
+        if self.db.manual_embeddings:
+            vector1, vector2 = self.db.get_embeddings_batch([query1, query2])
+        else:
+            vector1 = vector2 = None
         
-        print(f"\n{creator2}:")
-        print(f"  Total campaigns: {len(results2)}")
+        # Get campaigns for each creator (both searches in flight together)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future1 = pool.submit(self.search, query1, top_k=10, namespace=namespace,
+                                  filters={'creator': creator1}, query_vector=vector1)
+            future2 = pool.submit(self.search, query2, top_k=10, namespace=namespace,
+                                  filters={'creator': creator2}, query_vector=vector2)
+            results1, results2 = future1.result(), future2.result()
+        
+        if self.verbose:
+            for creator, results in ((creator1, results1), (creator2, results2)):
+                print(f"\n{creator}:")
+                print(f"  Total campaigns: {len(results)}")
+                values = _metric_values(results, metric)
+                if values:
+                    spread = f" (± {stdev(values):,.0f})" if len(values) > 1 else ""
+                    print(f"  Average {metric}: {fmean(values):,.0f}{spread} over {len(values)} campaigns")
+        
+        return results1, results2
     
     def interactive_mode(self):
         """Start interactive query session"""
@@ -243,20 +366,22 @@ class CampaignQueryInterface:
                 if not query:
                     continue
                 
+                # Too short or content-free to be worth a search
+                if len(query) < 3 or query.lower() in TRIVIAL_QUERIES or not any(c.isalnum() for c in query):
+                    print("Please enter a more specific question.")
+                    continue
+                
                 # Parse query for filters
                 filters = {}
                 
                 # Extract quarter filter and determine namespace
                 namespace = self.default_namespace
-                quarters = ["Q1", "Q2", "Q3", "Q4"]
-                for q in quarters:
-                    if q in query.upper():
-                        for year in ["2023", "2024", "2025"]:
-                            if year in query:
-                                quarter_str = f"{year} {q}"
-                                filters['quarter'] = quarter_str
-                                namespace = quarter_str.replace(' ', '_').lower()
-                                break
+                quarter_match = _QUARTER_RE.search(query)
+                year_match = _YEAR_RE.search(query) if quarter_match else None
+                if year_match:
+                    quarter_str = f"{year_match.group(1)} Q{quarter_match.group(1)}"
+                    filters['quarter'] = quarter_str
+                    namespace = quarter_str.replace(' ', '_').lower()
                 
                 # Search
                 results = self.search(query, top_k=10, namespace=namespace, filters=filters or None)
@@ -271,6 +396,9 @@ class CampaignQueryInterface:
 
 def main():
     """Main function with example queries"""
+    from pinecone_setup import configure_logging
+    configure_logging()
+    
     PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     
@@ -4,9 +4,9 @@ Quick Start Script for ENT Agency Vector Database
 This script guides you through the complete setup process
 """
 
+import importlib
 import os
 import sys
-import subprocess
 from pathlib import Path
 
 
@@ -36,22 +36,15 @@ def check_env_var(var_name):
 
 
 def install_dependencies():
-    """Install required Python packages"""
+    """Install required Python packages (from requirements.txt)"""
+    import subprocess
     print("Installing dependencies...")
-    packages = [
-        "pinecone",
-        "openai",
-        "gspread",
-        "oauth2client",
-        "google-auth",
-        "google-auth-oauthlib",
-        "google-api-python-client"
-    ]
+    requirements_file = Path(__file__).parent / "requirements.txt"
     
     try:
         subprocess.check_call([
             sys.executable, "-m", "pip", "install", 
-            *packages, "--break-system-packages", "--quiet"
+            "-r", str(requirements_file), "--disable-pip-version-check", "--break-system-packages", "--quiet"
         ])
         print("✓ All dependencies installed successfully")
         return True
@@ -112,15 +105,34 @@ def setup_google_credentials():
 
 
 def create_pinecone_index():
-    """Create Pinecone index"""
+    """
+    Create (or connect to) the Pinecone index in this process
+    
+    Returns:
+        The connected ENTAgencyVectorDB, or None on failure
+    """
     print("Creating Pinecone index...")
+    # Let this interpreter see the packages installed in step 1
+    importlib.invalidate_caches()
     try:
-        subprocess.check_call([sys.executable, "pinecone_setup.py"])
-        print("✓ Pinecone index created")
-        return True
-    except subprocess.CalledProcessError as e:
+        # Importing pinecone_setup also loads the .env written in step 2
+        from pinecone_setup import ENTAgencyVectorDB, configure_logging
+        configure_logging()
+        
+        pinecone_key = os.getenv('PINECONE_API_KEY')
+        openai_key = os.getenv('OPENAI_API_KEY')
+        if not pinecone_key or not openai_key:
+            print("✗ Error creating index: PINECONE_API_KEY and OPENAI_API_KEY must be set")
+            return None
+        
+        db = ENTAgencyVectorDB(pinecone_api_key=pinecone_key, openai_api_key=openai_key)
+        db.create_index()
+    except Exception as e:
         print(f"✗ Error creating index: {e}")
-        return False
+        return None
+    
+    print("✓ Pinecone index created")
+    return db
 
 
 def configure_data_source():
@@ -195,9 +207,11 @@ def main():
     
     # Step 4: Create Pinecone index
     print_step(4, "Creating Pinecone Index")
-    if not create_pinecone_index():
+    db = create_pinecone_index()
+    if db is None:
         print("\n❌ Setup failed at Pinecone index creation")
         return
+    db.close()
     
     # Step 5: Configure data source
     print_step(5, "Configuring Data Source")
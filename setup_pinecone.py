@@ -4,9 +4,18 @@ Quick setup script for Pinecone Vector Database
 This script will help you set up and verify your Pinecone index
 """
 
+import importlib.util
 import os
 import sys
 
+from env_loader import load_env_file
+
+
+def mask_key(key):
+    """API key reduced to its last 4 characters, safe to print"""
+    return f"...{key[-4:]}"
+
+
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -17,19 +26,11 @@ except ImportError:
     if os.path.exists('.env'):
         print("Loading .env file manually...")
         try:
-            with open('.env', 'r', encoding='utf-8-sig') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        parts = line.split('=', 1)
-                        if len(parts) == 2:
-                            key = parts[0].strip()
-                            value = parts[1].strip()
-                            if key and value:
-                                os.environ[key] = value
-                                # Debug: print first few keys loaded
-                                if key == 'PINECONE_API_KEY' or key == 'OPENAI_API_KEY':
-                                    print(f"  Loaded {key}: {value[:15]}...")
+            env_vars = load_env_file()
+            # Debug: show the API keys found (variables already set in the environment win)
+            for key in ('PINECONE_API_KEY', 'OPENAI_API_KEY'):
+                if key in env_vars:
+                    print(f"  Loaded {key}: {mask_key(os.environ[key])}")
             print("OK Loaded .env file manually")
         except Exception as e:
             print(f"WARN Could not load .env: {e}")
@@ -54,8 +55,8 @@ if not OPENAI_API_KEY:
     print("   Or set it as: $env:OPENAI_API_KEY='your-key'")
     sys.exit(1)
 
-print(f"OK PINECONE_API_KEY found ({PINECONE_API_KEY[:10]}...)")
-print(f"OK OPENAI_API_KEY found ({OPENAI_API_KEY[:10]}...)")
+print(f"OK PINECONE_API_KEY found ({mask_key(PINECONE_API_KEY)})")
+print(f"OK OPENAI_API_KEY found ({mask_key(OPENAI_API_KEY)})")
 
 # Try to import Pinecone
 try:
@@ -71,11 +72,10 @@ except ImportError:
     print("  3. Install packages manually")
     sys.exit(1)
 
-# Try to import OpenAI
-try:
-    import openai
+# Check for OpenAI (only located: this script never calls it, so it isn't worth importing)
+if importlib.util.find_spec('openai') is not None:
     print("OK OpenAI SDK installed")
-except ImportError:
+else:
     print("\nWARN OpenAI SDK not installed (optional for some operations)")
     print("  pip install openai --break-system-packages")
 
@@ -86,18 +86,17 @@ print("="*70)
 
 try:
     pc = Pinecone(api_key=PINECONE_API_KEY)
-    indexes = list(pc.list_indexes())
+    index_names = [idx.name for idx in pc.list_indexes()]
     print(f"OK Connected to Pinecone successfully!")
-    print(f"  Found {len(indexes)} existing index(es)")
+    print(f"  Found {len(index_names)} existing index(es)")
     
-    if indexes:
+    if index_names:
         print("\nExisting indexes:")
-        for idx in indexes:
-            print(f"  • {idx.name}")
+        for name in index_names:
+            print(f"  • {name}")
     
     # Check for our index
     index_name = "ent-agency-campaigns"
-    index_names = [idx.name for idx in indexes]
     
     if index_name in index_names:
         print(f"\nOK Index '{index_name}' already exists!")
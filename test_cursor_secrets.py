@@ -2,24 +2,35 @@
 Test script to verify Cursor Global Secrets are configured correctly.
 Run this after setting up secrets in Cursor → Settings → Secrets
 """
+import json
 import os
 import sys
 
+# orjson parses noticeably faster; fall back to the stdlib parser without it
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+MCP_CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".cursor", "mcp", "config.json")
+
+# Secrets Cursor should expose to every project, in report order
+SECRET_NAMES = (
+    "OPENAI_API_KEY",
+    "SUPABASE_URL",
+    "SUPABASE_ANON_KEY",
+    "SUPABASE_SERVICE_ROLE_KEY",
+    "PINECONE_API_KEY"
+)
+
 def test_secrets():
     """Test that Cursor secrets are available"""
     print("🔍 Checking Cursor Global Secrets...\n")
     print("=" * 60)
     
-    secrets = {
-        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
-        "SUPABASE_URL": os.getenv("SUPABASE_URL"),
-        "SUPABASE_ANON_KEY": os.getenv("SUPABASE_ANON_KEY"),
-        "SUPABASE_SERVICE_ROLE_KEY": os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
-        "PINECONE_API_KEY": os.getenv("PINECONE_API_KEY")
-    }
-    
     results = {}
-    for key, value in secrets.items():
+    for key in SECRET_NAMES:
+        value = os.environ.get(key)
         if value:
             # Show first 8 chars and last 4 chars for verification
             masked = f"{value[:8]}...{value[-4:]}" if len(value) > 12 else "***"
@@ -55,26 +66,22 @@ def test_secrets():
 
 def test_mcp_config():
     """Check if MCP config file exists"""
-    import pathlib
-    mcp_config_path = pathlib.Path.home() / ".cursor" / "mcp" / "config.json"
-    
     print("\n🔧 Checking MCP Configuration...")
-    if mcp_config_path.exists():
-        print(f"✅ MCP config found at: {mcp_config_path}")
-        try:
-            import json
-            with open(mcp_config_path, 'r') as f:
-                config = json.load(f)
-            servers = list(config.get("mcpServers", {}).keys())
-            print(f"   Configured servers: {', '.join(servers)}")
-            return True
-        except Exception as e:
-            print(f"⚠️  MCP config exists but has errors: {e}")
-            return False
-    else:
-        print(f"❌ MCP config not found at: {mcp_config_path}")
+    try:
+        with open(MCP_CONFIG_PATH, 'rb') as f:
+            config = json_loads(f.read())
+        servers = list(config.get("mcpServers", {}).keys())
+    except FileNotFoundError:
+        print(f"❌ MCP config not found at: {MCP_CONFIG_PATH}")
         print("   (This is OK if you only want to use secrets, not MCP tools)")
         return False
+    except Exception as e:
+        print(f"⚠️  MCP config exists but has errors: {e}")
+        return False
+    
+    print(f"✅ MCP config found at: {MCP_CONFIG_PATH}")
+    print(f"   Configured servers: {', '.join(servers)}")
+    return True
 
 if __name__ == "__main__":
     print("\n" + "=" * 60)
@@ -3,47 +3,33 @@ Test Script for ENT Agency Vector Database
 Run this to verify your setup is working correctly
 """
 
+import importlib.util
+import io
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-# Fix Windows console encoding
+# Fix Windows console encoding (IDE runners and capture wrappers may swap in streams
+# without reconfigure(), which are left as they are)
 if sys.platform == 'win32':
-    import codecs
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, 'reconfigure'):
+            stream.reconfigure(encoding='utf-8')
+
+# Import names of the required packages (each matches its pip package name)
+REQUIRED_PACKAGES = ('pinecone', 'openai', 'gspread', 'oauth2client')
 
 
 def test_imports():
     """Test if all required packages are installed"""
     print("Testing imports...")
     
-    try:
-        import pinecone
-        print("OK pinecone")
-    except ImportError:
-        print("FAIL pinecone - Run: pip install pinecone")
-        return False
-    
-    try:
-        import openai
-        print("OK openai")
-    except ImportError:
-        print("FAIL openai - Run: pip install openai")
-        return False
-    
-    try:
-        import gspread
-        print("OK gspread")
-    except ImportError:
-        print("FAIL gspread - Run: pip install gspread")
-        return False
-    
-    try:
-        from oauth2client.service_account import ServiceAccountCredentials
-        print("OK oauth2client")
-    except ImportError:
-        print("FAIL oauth2client - Run: pip install oauth2client")
-        return False
+    # Only locate the packages: importing the SDKs just to probe for them costs more than the check
+    for package in REQUIRED_PACKAGES:
+        if importlib.util.find_spec(package) is None:
+            print(f"FAIL {package} - Run: pip install {package}")
+            return False
+        print(f"OK {package}")
     
     return True
 
@@ -80,48 +66,58 @@ def test_credentials():
         return False
 
 
-def test_pinecone_connection():
-    """Test Pinecone connection"""
-    print("\nTesting Pinecone connection...")
+def test_pinecone_connection(out=None):
+    """
+    Test Pinecone connection
+    
+    Args:
+        out: Stream to report to (defaults to stdout)
+    """
+    print("\nTesting Pinecone connection...", file=out)
     
     try:
         from pinecone import Pinecone
         
         api_key = os.getenv('PINECONE_API_KEY')
         if not api_key:
-            print("✗ Cannot test - PINECONE_API_KEY not set")
+            print("✗ Cannot test - PINECONE_API_KEY not set", file=out)
             return False
         
         pc = Pinecone(api_key=api_key)
         indexes = pc.list_indexes()
         
-        print(f"OK Connected to Pinecone")
-        print(f"  Found {len(indexes)} index(es)")
+        print(f"OK Connected to Pinecone", file=out)
+        print(f"  Found {len(indexes)} index(es)", file=out)
         
         # Check for our specific index
         index_names = [idx.name for idx in indexes]
         if 'ent-agency-campaigns' in index_names:
-            print("  OK 'ent-agency-campaigns' index exists")
+            print("  OK 'ent-agency-campaigns' index exists", file=out)
         else:
-            print("  WARN 'ent-agency-campaigns' index not found (run pinecone_setup.py)")
+            print("  WARN 'ent-agency-campaigns' index not found (run pinecone_setup.py)", file=out)
         
         return True
         
     except Exception as e:
-        print(f"FAIL Pinecone connection failed: {e}")
+        print(f"FAIL Pinecone connection failed: {e}", file=out)
         return False
 
 
-def test_openai_connection():
-    """Test OpenAI connection"""
-    print("\nTesting OpenAI connection...")
+def test_openai_connection(out=None):
+    """
+    Test OpenAI connection
+    
+    Args:
+        out: Stream to report to (defaults to stdout)
+    """
+    print("\nTesting OpenAI connection...", file=out)
     
     try:
         import openai
         
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
-            print("✗ Cannot test - OPENAI_API_KEY not set")
+            print("✗ Cannot test - OPENAI_API_KEY not set", file=out)
             return False
         
         client = openai.OpenAI(api_key=api_key)
@@ -132,13 +128,13 @@ def test_openai_connection():
             model="text-embedding-3-small"
         )
         
-        print(f"OK Connected to OpenAI")
-        print(f"  Embedding dimension: {len(response.data[0].embedding)}")
+        print(f"OK Connected to OpenAI", file=out)
+        print(f"  Embedding dimension: {len(response.data[0].embedding)}", file=out)
         
         return True
         
     except Exception as e:
-        print(f"FAIL OpenAI connection failed: {e}")
+        print(f"FAIL OpenAI connection failed: {e}", file=out)
         return False
 
 
@@ -154,8 +150,16 @@ def main():
     results['imports'] = test_imports()
     results['env_vars'] = test_env_vars()
     results['credentials'] = test_credentials()
-    results['pinecone'] = test_pinecone_connection()
-    results['openai'] = test_openai_connection()
+    
+    # The two network checks are independent, so they run side by side; each reports into
+    # its own buffer, printed in order once both are done
+    pinecone_out, openai_out = io.StringIO(), io.StringIO()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pinecone_check = executor.submit(test_pinecone_connection, pinecone_out)
+        openai_check = executor.submit(test_openai_connection, openai_out)
+    sys.stdout.write(pinecone_out.getvalue() + openai_out.getvalue())
+    results['pinecone'] = pinecone_check.result()
+    results['openai'] = openai_check.result()
     
     # Summary
     print("\n" + "="*70)